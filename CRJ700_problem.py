@@ -0,0 +1,1371 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - CRJ700 Aerostructural Problem Builder
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import argparse
+import functools
+import hashlib
+import inspect
+import os
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+from openaerostruct.geometry.utils import generate_mesh
+from openaerostruct.integration.aerostruct_groups import AerostructGeometry, AerostructPoint
+from openaerostruct.structures.wingbox_fuel_vol_delta import WingboxFuelVolDelta
+import openmdao.api as om
+from openmdao.utils.coloring import Coloring
+from openaerostruct.aerodynamics.lift_coeff_2D import LiftCoeff2D
+from checkpoint import CheckpointRecorder
+from mission_comps import FuelDiff, WeightBuildUp
+from profiling import profile_components
+from sweep_times_span import SweepTimesSpan
+
+
+def _read_only(array):
+    """
+    Marks an array shared between problems as read-only and returns it.
+    """
+    array.flags.writeable = False
+    return array
+
+
+@functools.lru_cache(maxsize=None)
+def wingbox_airfoil():
+    """
+    Returns the wingbox cross-section coordinates shared by every surface.
+
+    The arrays are built on the first call only and are read-only, since
+    every surface of every problem in the process refers to the same ones.
+
+    Returns
+    -------
+    airfoil : mappingproxy
+        upper_x, lower_x, upper_y and lower_y of the SC2-0612 section, and
+        tail_lower_y of its symmetric version (used by the CRJ700 tail).
+    """
+    # Provide coordinates for a portion of an airfoil for the wingbox cross-section as an nparray with dtype=complex (to work with the complex-step approximation for derivatives).
+    # These should be for an airfoil with the chord scaled to 1.
+    # We use the 10% to 60% portion of the NASA SC2-0612 airfoil for this case
+    # We use the coordinates available from airfoiltools.com. Using such a large number of coordinates is not necessary.
+    # The first and last x-coordinates of the upper and lower surfaces must be the same
+
+    upper_x = np.array([0.1, 0.11, 0.12, 0.13, 0.14, 0.15, 0.16, 0.17, 0.18, 0.19, 0.2, 0.21, 0.22, 0.23, 0.24, 0.25, 0.26, 0.27, 0.28, 0.29, 0.3, 0.31, 0.32, 0.33, 0.34, 0.35, 0.36, 0.37, 0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47, 0.48, 0.49, 0.5, 0.51, 0.52, 0.53, 0.54, 0.55, 0.56, 0.57, 0.58, 0.59, 0.6], dtype="complex128")
+    lower_x = np.array([0.1, 0.11, 0.12, 0.13, 0.14, 0.15, 0.16, 0.17, 0.18, 0.19, 0.2, 0.21, 0.22, 0.23, 0.24, 0.25, 0.26, 0.27, 0.28, 0.29, 0.3, 0.31, 0.32, 0.33, 0.34, 0.35, 0.36, 0.37, 0.38, 0.39, 0.4, 0.41, 0.42, 0.43, 0.44, 0.45, 0.46, 0.47, 0.48, 0.49, 0.5, 0.51, 0.52, 0.53, 0.54, 0.55, 0.56, 0.57, 0.58, 0.59, 0.6], dtype="complex128")
+    upper_y = np.array([ 0.0447,  0.046,  0.0472,  0.0484,  0.0495,  0.0505,  0.0514,  0.0523,  0.0531,  0.0538, 0.0545,  0.0551,  0.0557, 0.0563,  0.0568, 0.0573,  0.0577,  0.0581,  0.0585,  0.0588,  0.0591,  0.0593,  0.0595,  0.0597,  0.0599,  0.06,    0.0601,  0.0602,  0.0602,  0.0602,  0.0602,  0.0602,  0.0601,  0.06,    0.0599,  0.0598,  0.0596,  0.0594,  0.0592,  0.0589,  0.0586,  0.0583,  0.058,   0.0576,  0.0572,  0.0568,  0.0563,  0.0558,  0.0553,  0.0547,  0.0541], dtype="complex128")  # noqa: E201, E241
+    lower_y = np.array([-0.0447, -0.046, -0.0473, -0.0485, -0.0496, -0.0506, -0.0515, -0.0524, -0.0532, -0.054, -0.0547, -0.0554, -0.056, -0.0565, -0.057, -0.0575, -0.0579, -0.0583, -0.0586, -0.0589, -0.0592, -0.0594, -0.0595, -0.0596, -0.0597, -0.0598, -0.0598, -0.0598, -0.0598, -0.0597, -0.0596, -0.0594, -0.0592, -0.0589, -0.0586, -0.0582, -0.0578, -0.0573, -0.0567, -0.0561, -0.0554, -0.0546, -0.0538, -0.0529, -0.0519, -0.0509, -0.0497, -0.0485, -0.0472, -0.0458, -0.0444], dtype="complex128")
+    # The CRJ700 tail uses the symmetric version of the section (lower surface mirrors the upper one)
+    tail_lower_y = np.array([-0.0447, -0.046, -0.0472, -0.0484, -0.0495, -0.0505, -0.0514, -0.0523, -0.0531, -0.0538, -0.0545, -0.0551, -0.0557, -0.0563, -0.0568, -0.0573, -0.0577, -0.0581, -0.0585, -0.0588, -0.0591, -0.0593, -0.0595, -0.0597, -0.0599, -0.06, -0.0601, -0.0602, -0.0602, -0.0602, -0.0602, -0.0602, -0.0601, -0.06, -0.0599, -0.0598, -0.0596, -0.0594, -0.0592, -0.0589, -0.0586, -0.0583, -0.058, -0.0576, -0.0572, -0.0568, -0.0563, -0.0558, -0.0553, -0.0547, -0.0541], dtype="complex128")
+
+    airfoil = {
+        "upper_x": upper_x,
+        "lower_x": lower_x,
+        "upper_y": upper_y,
+        "lower_y": lower_y,
+        "tail_lower_y": tail_lower_y,
+    }
+    return MappingProxyType({key: _read_only(val) for key, val in airfoil.items()})
+
+
+@functools.lru_cache(maxsize=None)
+def rect_mesh(num_x, num_y, root_chord, span_cos_spacing=None, offset=None, num_twist_cp=None):
+    """
+    Returns a read-only rectangular half-wing mesh, generated once per set of arguments.
+
+    Parameters
+    ----------
+    num_x : int
+        Number of chordwise mesh points.
+    num_y : int
+        Number of spanwise mesh points.
+    root_chord : float
+        Root chord [m].
+    span_cos_spacing : float or None
+        Spanwise cosine spacing. If None, the OpenAeroStruct default is used.
+    offset : tuple or None
+        Offset of the mesh (x, y, z) [m].
+    num_twist_cp : int or None
+        Number of twist control points passed to generate_mesh.
+
+    Returns
+    -------
+    mesh : np.ndarray
+        The mesh, shared by every caller.
+    """
+    mesh_dict = {"num_y": num_y, "num_x": num_x, "wing_type": "rect", "symmetry": True, "root_chord": root_chord}
+    if span_cos_spacing is not None:
+        mesh_dict["span_cos_spacing"] = span_cos_spacing
+    if offset is not None:
+        mesh_dict["offset"] = np.array(offset)
+    if num_twist_cp is not None:
+        mesh_dict["num_twist_cp"] = num_twist_cp
+
+    return _read_only(generate_mesh(mesh_dict))
+
+
+# Flight conditions of an analysis point. The Reynolds number per unit length
+# and the flight speed are derived from these values.
+FlightPoint = namedtuple("FlightPoint", ["Mach_number", "speed_of_sound", "rho", "mu", "load_factor"])
+
+CRUISE = FlightPoint(Mach_number=0.78, speed_of_sound=296.54, rho=0.3796, mu=1.43e-5, load_factor=1.0)
+MANEUVER = FlightPoint(Mach_number=0.64, speed_of_sound=340.294, rho=1.225, mu=1.81206e-5, load_factor=2.5)
+
+
+def alpha_name(i):
+    """
+    Returns the name of the angle of attack of flight point i.
+
+    The first two points keep the names of the cruise and maneuver points,
+    "alpha" and "alpha_maneuver", the others are "alpha_2", "alpha_3", ...
+    """
+    if i == 0:
+        return "alpha"
+    if i == 1:
+        return "alpha_maneuver"
+    return "alpha_{}".format(i)
+
+# Initial values of the model inputs, per model. These are (re)applied every
+# time a problem is requested, so a cached problem always starts from them.
+INITIAL_VALUES = {
+    "CRJ700": {
+        "wing.twist_cp": np.array([0.0, 0.0]),  # [deg]
+        "wing.spar_thickness_cp": np.array([0.003, 0.003]),  # [m]
+        "wing.skin_thickness_cp": np.array([0.003, 0.00442718]),  # [m]
+        "tail.twist_cp": np.array([1.20011518, 2.3368427]),  # [deg]
+        "tail.spar_thickness_cp": np.array([0.004, 0.01]),  # [m]
+        "tail.skin_thickness_cp": np.array([0.005, 0.025]),  # [m]
+        "alpha": 4.10241351,  # [deg]
+        "alpha_maneuver": 3.78513981,  # [deg]
+        "sweep": 30.0,  # [deg]
+        "span": 23.24,  # [m]
+        "tail_span": 8.54,  # [m]
+        "taper": 0.3,
+        "tail_taper": 0.3,
+        "empty_cg": np.array([2.0, 0, 0]),  # [m]
+        "fuel_mass": 1000.0,  # [kg]
+        "point_masses": np.array([[1e3]]),  # [kg]
+        "point_mass_locations": np.array([[10, 2.0, 1.0]]),  # [m]
+    },
+    "mesh_study": {
+        "wing.twist_cp": np.array([0.0, 0.0, 0.0, 0.0]),  # [deg]
+        "wing.spar_thickness_cp": np.array([0.01, 0.008, 0.005, 0.004]),  # [m]
+        "wing.skin_thickness_cp": np.array([0.025, 0.015, 0.01, 0.005]),  # [m]
+        "tail.twist_cp": np.array([-5.0, -5.0, -5.0, -5.0]),  # [deg]
+        "tail.spar_thickness_cp": np.array([0.01, 0.008, 0.005, 0.004]),  # [m]
+        "tail.skin_thickness_cp": np.array([0.025, 0.015, 0.01, 0.005]),  # [m]
+        "alpha": 5.0,  # [deg]
+        "alpha_maneuver": 5.0,  # [deg]
+        "sweep": 30.0,  # [deg]
+        "span": 23.24,  # [m]
+        "tail_span": 10.0,  # [m]
+        "taper": 0.3,
+        "tail_taper": 0.3,
+        "empty_cg": np.zeros((3)),  # [m]
+        "fuel_mass": 1000.0,  # [kg]
+        "point_masses": np.array([[1e3]]),  # [kg]
+        "point_mass_locations": np.array([[2, 4.0, 0.0]]),  # [m]
+    },
+}
+
+# Design variables that can be selected by name, with their bounds and scaling
+DESIGN_VARS = {
+    "CRJ700": {
+        "wing.twist_cp": dict(lower=np.array([[0, 0]]), upper=np.array([10, 0]), scaler=0.1),
+        "tail.twist_cp": dict(lower=np.array([[-10, -10]]), upper=np.array([[10, 10]]), scaler=0.1),
+        "wing.spar_thickness_cp": dict(lower=0.003, upper=0.1, scaler=1e2),
+        "wing.skin_thickness_cp": dict(lower=0.003, upper=0.1, scaler=1e2),
+        "wing.geometry.span": dict(lower=15, upper=30, scaler=0.1),
+        "tail.geometry.span": dict(lower=6, upper=12, scaler=0.1),
+        "wing.taper": dict(lower=0.25, upper=0.5),
+        "tail.taper": dict(lower=0.1, upper=0.5),
+        "wing.sweep": dict(lower=10, upper=40),
+        "alpha": dict(lower=0.0, upper=15),
+        "alpha_maneuver": dict(lower=0.0, upper=15),
+        "fuel_mass": dict(lower=0.0, upper=2e5, scaler=1e-5),
+        "point_mass_locations": dict(lower=np.array([[0, 2.0, 1.0]]), upper=np.array([[8, 10.0, 4.0]])),
+    },
+    "mesh_study": {
+        "tail.twist_cp": dict(lower=np.array([[-15, -10, -5, -5]]), upper=np.array([[0, 0, 0, 0]]), scaler=0.1),
+        "alpha": dict(lower=-15.0, upper=15),
+        "alpha_maneuver": dict(lower=-15.0, upper=15),
+    },
+}
+
+# Constraints that can be selected by name
+CONSTRAINTS = {
+    "CRJ700": {
+        "AS_point_0.CM": dict(lower=0.0, upper=0.001),
+        "AS_point_0.L_equals_W": dict(equals=0.0),
+        "AS_point_1.L_equals_W": dict(equals=0.0),
+        "AS_point_1.wing_perf.failure": dict(upper=0.0),
+        "fuel_vol_delta.fuel_vol_delta": dict(lower=0.0),
+        "Cl": dict(upper=0.6),
+        "fuel_diff": dict(equals=0.0),
+        "sweep_times_span": dict(lower=100, upper=697.2),
+    },
+    "mesh_study": {
+        "AS_point_0.CM": dict(lower=0.0, upper=0.01),
+        "AS_point_0.L_equals_W": dict(equals=0.0),
+        "AS_point_1.L_equals_W": dict(equals=0.0),
+    },
+}
+
+# Design variables and constraints of the full CRJ700 optimization (CRJ700_final.py)
+FINAL_DESIGN_VARS = (
+    "wing.twist_cp",
+    "tail.twist_cp",
+    "wing.spar_thickness_cp",
+    "wing.skin_thickness_cp",
+    "wing.geometry.span",
+    "wing.taper",
+    "wing.sweep",
+    "alpha",
+    "alpha_maneuver",
+    "fuel_mass",
+)
+FINAL_CONSTRAINTS = (
+    "AS_point_0.CM",
+    "AS_point_0.L_equals_W",
+    "AS_point_1.L_equals_W",
+    "AS_point_1.wing_perf.failure",
+    "fuel_vol_delta.fuel_vol_delta",
+    "Cl",
+    "fuel_diff",
+)
+
+# Variables read by plot_aerostruct.py and by print_results
+POST_PROCESSING_VARS = [
+    "alpha",
+    "alpha_maneuver",
+    "sweep",
+    "span",
+    "wing.sweep",
+    "wing.geometry.sweep",
+    "wing.geometry.span",
+    "tail.geometry.span",
+    "wing.geometry.t_over_c_cp",
+    "wing.twist_cp",
+    "tail.twist_cp",
+    "wing.spar_thickness_cp",
+    "wing.skin_thickness_cp",
+    "wing.structural_mass",
+    "point_mass_locations",
+    "sweep_times_span",
+    "sweep_constraint.sweep_times_span",
+    "AS_point_0.fuelburn",
+    "AS_point_0.wing_perf.CD",
+    "AS_point_0.wing_perf.CL",
+    "AS_point_0.tail_perf.CD",
+    "AS_point_0.tail_perf.CL",
+    "AS_point_0.CM",
+    "AS_point_0.cg",
+    "Cl",
+    "AS_point_0.L_equals_W",
+    "AS_point_1.L_equals_W",
+    "AS_point_0.coupled.wing.lengths",
+    "AS_point_0.coupled.tail.lengths",
+]
+
+# Coupled aerostructural states, used as initial guesses when restarting
+COUPLED_STATE_VARS = [
+    "*.coupled.*.disp",
+    "*.coupled.*_loads.loads",
+    "*.coupled.aero_states.circulations",
+]
+
+# Recording options applied to the driver (every iteration) and to the problem.
+# Design variables, objectives and constraints are always recorded.
+# "minimal": nothing else, enough to follow the optimization
+# "post": the variables needed to post-process the run
+# "restart": "post" plus the coupled states, to warm start later runs
+# "full": every input and output, which for large meshes makes the database extremely large
+RECORDING_PROFILES = {
+    "minimal": dict(includes=[], record_inputs=False),
+    "post": dict(includes=POST_PROCESSING_VARS, record_inputs=True),
+    "restart": dict(includes=POST_PROCESSING_VARS + COUPLED_STATE_VARS, record_inputs=True),
+    "full": dict(includes=["*"], record_inputs=True),
+}
+
+def nlbgs_solvers(coupled):
+    """
+    Keeps OpenAeroStruct's NonlinearBlockGS with Aitken acceleration and solves the adjoint with LinearBlockGS.
+    """
+    coupled.linear_solver = om.LinearBlockGS(iprint=0, maxiter=30, use_aitken=True)
+
+
+def newton_direct_solvers(coupled):
+    """
+    Solves the coupled group with Newton, factorizing the coupled Jacobian with a DirectSolver.
+
+    Newton raises an AnalysisError if it does not converge, instead of
+    silently returning unconverged states.
+    """
+    coupled.nonlinear_solver = om.NewtonSolver(solve_subsystems=True, maxiter=20, atol=1e-7, rtol=1e-30, iprint=0,
+                                               err_on_non_converge=True)
+    coupled.linear_solver = om.DirectSolver()
+
+
+def newton_krylov_solvers(coupled):
+    """
+    Solves the coupled group with Newton and GMRES, preconditioned by LinearBlockGS.
+
+    Two block Gauss-Seidel sweeps are too weak a preconditioner at the 2.5g
+    point, where GMRES then returns inexact steps and Newton stalls, so the
+    preconditioner runs up to 10 Aitken-accelerated sweeps. Newton raises an
+    AnalysisError if it does not converge.
+    """
+    coupled.nonlinear_solver = om.NewtonSolver(solve_subsystems=True, maxiter=20, atol=1e-7, rtol=1e-30, iprint=0,
+                                               err_on_non_converge=True)
+    coupled.linear_solver = om.ScipyKrylov(iprint=0, maxiter=100, atol=1e-10, rtol=1e-10)
+    coupled.linear_solver.precon = om.LinearBlockGS(iprint=-1, maxiter=10, atol=1e-12, rtol=1e-6, use_aitken=True)
+
+
+# Solver strategies of the aerostructural coupled group, used for the
+# nonlinear solve and for the derivatives (Newton steps and adjoint)
+COUPLED_SOLVERS = {
+    "nlbgs": nlbgs_solvers,
+    "newton-direct": newton_direct_solvers,
+    "newton-krylov": newton_krylov_solvers,
+}
+
+_problem_cache = {}
+
+# Directory of the cached total coloring of each problem configuration
+COLORING_DIR = "coloring_files"
+
+
+def _point_options(table, name):
+    """
+    Returns the options of a design variable or constraint, also for flight points without their own entry.
+
+    "AS_point_3.L_equals_W" takes the options of the first point with a
+    "L_equals_W" entry, and "alpha_3" those of "alpha".
+
+    Parameters
+    ----------
+    table : dict
+        DESIGN_VARS[model] or CONSTRAINTS[model].
+    name : str
+        Name of the design variable or constraint.
+
+    Returns
+    -------
+    options : dict
+        Keyword arguments of add_design_var or add_constraint.
+    """
+    if name in table:
+        return table[name]
+
+    point, sep, suffix = name.partition(".")
+    if point.startswith("AS_point_") and sep:
+        for other, options in table.items():
+            if other.startswith("AS_point_") and other.partition(".")[2] == suffix:
+                return options
+    if name.startswith("alpha_") and name[len("alpha_"):].isdigit():
+        return table["alpha"]
+
+    raise KeyError("Unknown design variable or constraint '{}'".format(name))
+
+
+def crj700_surfaces(num_x=5, num_y=21, span_cos_spacing=None):
+    """
+    Creates the wing and tail surface dictionaries of the CRJ700 model.
+
+    Parameters
+    ----------
+    num_x : int
+        Number of chordwise mesh points of the wing.
+    num_y : int
+        Number of spanwise mesh points of the wing.
+    span_cos_spacing : float or None
+        Spanwise cosine spacing of the wing and tail meshes. If None, the
+        OpenAeroStruct default is used.
+
+    Returns
+    -------
+    surfaces : list
+        Wing and tail surface dictionaries.
+    """
+    values = INITIAL_VALUES["CRJ700"]
+
+    airfoil = wingbox_airfoil()
+
+    mesh = rect_mesh(num_x, num_y, root_chord=4.5, span_cos_spacing=span_cos_spacing)
+
+    surf_dict = {
+        # Wing definition
+        "name": "wing",  # give the surface some name
+        "symmetry": True,  # if True, model only one half of the lifting surface
+        "S_ref_type": "projected",  # how we compute the wing area,
+        # can be 'wetted' or 'projected'
+        "mesh": mesh,
+        "fem_model_type": "wingbox",  # 'wingbox' or 'tube'
+        "data_x_upper": airfoil["upper_x"],
+        "data_x_lower": airfoil["lower_x"],
+        "data_y_upper": airfoil["upper_y"],
+        "data_y_lower": airfoil["lower_y"],
+        "twist_cp": values["wing.twist_cp"],  # [deg]
+        "span": 23.24,
+        "root_chord": 4.5,
+        "taper": 0.3,
+        "spar_thickness_cp": values["wing.spar_thickness_cp"],  # [m]
+        "skin_thickness_cp": values["wing.skin_thickness_cp"],  # [m]
+        "t_over_c_cp": np.array([0.12]),
+        "original_wingbox_airfoil_t_over_c": 0.12,
+        "sweep": 30,
+        "AR": 8,
+        # Aerodynamic deltas.
+        # These CL0 and CD0 values are added to the CL and CD
+        # obtained from aerodynamic analysis of the surface to get
+        # the total CL and CD.
+        # These CL0 and CD0 values do not vary wrt alpha.
+        # They can be used to account for things that are not included, such as contributions from the fuselage, camber, etc.
+        "CL0": 0.0,  # CL delta
+        "CD0": 0.0078,  # CD delta
+        "with_viscous": True,  # if true, compute viscous drag
+        "with_wave": True,  # if true, compute wave drag
+        # Airfoil properties for viscous drag calculation
+        "k_lam": 0.03,  # fraction of chord with laminar
+        # flow, used for viscous drag
+        "c_max_t": 0.4,  # chordwise location of maximum thickness
+        # Structural values are based on aluminum 7075
+        "E": 73.1e9,  # [Pa] Young's modulus
+        "G": (73.1e9 / 2 / 1.33),  # [Pa] shear modulus (calculated using E and the Poisson's ratio here)
+        "yield": (420.0e6 / 1.5),  # [Pa] allowable yield stress
+        "mrho": 2.78e3,  # [kg/m^3] material density
+        "strength_factor_for_upper_skin": 1.0,  # the yield stress is multiplied by this factor for the upper skin
+        "wing_weight_ratio": 1.25,
+        "exact_failure_constraint": False,  # if false, use KS function
+        "struct_weight_relief": True,
+        "distributed_fuel_weight": True,
+        "engine_thrusts": 56400,
+        "n_point_masses": 1,  # number of point masses in the system; in this case, the engine (omit option if no point masses)
+        "fuel_density": 803.0,  # [kg/m^3] fuel density (only needed if the fuel-in-wing volume constraint is used)
+        "Wf_reserve": 1125.0  # [kg] reserve fuel mass
+    }
+
+    mesh = rect_mesh(3, 21, root_chord=2, span_cos_spacing=span_cos_spacing, offset=(15, 0.0, 3.0))
+
+    surf_dict2 = {
+        # Wing definition
+        "name": "tail",  # give the surface some name
+        "symmetry": True,  # if True, model only one half of the lifting surface
+        "S_ref_type": "projected",  # how we compute the wing area,
+        # can be 'wetted' or 'projected'
+        "mesh": mesh,
+        "span": 8.54,
+        "root_chord": 2,
+        "taper": 0.3,
+        "sweep": 30,
+        "fem_model_type": "wingbox",  # 'wingbox' or 'tube'
+        "data_x_upper": airfoil["upper_x"],
+        "data_x_lower": airfoil["lower_x"],
+        "data_y_upper": airfoil["upper_y"],
+        "data_y_lower": airfoil["tail_lower_y"],
+        "twist_cp": values["tail.twist_cp"],  # [deg]
+        "spar_thickness_cp": values["tail.spar_thickness_cp"],  # [m]
+        "skin_thickness_cp": values["tail.skin_thickness_cp"],  # [m]
+        "t_over_c_cp": np.array([0.12]),
+        "original_wingbox_airfoil_t_over_c": 0.12,
+        # Aerodynamic deltas.
+        "CL0": 0.0,  # CL delta
+        "CD0": 0.0078,  # CD delta
+        "with_viscous": True,  # if true, compute viscous drag
+        "with_wave": True,  # if true, compute wave drag
+        # Airfoil properties for viscous drag calculation
+        "k_lam": 0.03,  # fraction of chord with laminar
+        # flow, used for viscous drag
+        "c_max_t": 0.4,  # chordwise location of maximum thickness
+        # Structural values are based on aluminum 7075
+        "E": 73.1e9,  # [Pa] Young's modulus
+        "G": (73.1e9 / 2 / 1.33),  # [Pa] shear modulus (calculated using E and the Poisson's ratio here)
+        "yield": (420.0e6 / 1.5),  # [Pa] allowable yield stress
+        "mrho": 2.78e3,  # [kg/m^3] material density
+        "strength_factor_for_upper_skin": 1.0,  # the yield stress is multiplied by this factor for the upper skin
+        "wing_weight_ratio": 1.25,
+        "struct_weight_relief": True,
+        "distributed_fuel_weight": True,
+        "Wf_reserve": 0.0,  # [kg] reserve fuel mass
+        "exact_failure_constraint": False  # if false, use KS function
+    }
+
+    return [surf_dict, surf_dict2]
+
+
+def mesh_study_surfaces(num_x, num_y):
+    """
+    Creates the wing and tail surface dictionaries used in the mesh convergence study.
+
+    Parameters
+    ----------
+    num_x : int
+        Number of chordwise mesh points of the wing.
+    num_y : int
+        Number of spanwise mesh points of the wing.
+
+    Returns
+    -------
+    surfaces : list
+        Wing and tail surface dictionaries.
+    """
+    values = INITIAL_VALUES["mesh_study"]
+
+    airfoil = wingbox_airfoil()
+
+    mesh = rect_mesh(num_x, num_y, root_chord=3.0, num_twist_cp=4)
+
+    surf_dict = {
+        # Wing definition
+        "name": "wing",  # give the surface some name
+        "symmetry": True,  # if True, model only one half of the lifting surface
+        "S_ref_type": "projected",  # how we compute the wing area,
+        # can be 'wetted' or 'projected'
+        "mesh": mesh,
+        "fem_model_type": "wingbox",  # 'wingbox' or 'tube'
+        "data_x_upper": airfoil["upper_x"],
+        "data_x_lower": airfoil["lower_x"],
+        "data_y_upper": airfoil["upper_y"],
+        "data_y_lower": airfoil["lower_y"],
+        "twist_cp": values["wing.twist_cp"],  # [deg]
+        "span": 23.24,
+        "root_chord": 3.0,
+        "spar_thickness_cp": values["wing.spar_thickness_cp"],  # [m]
+        "skin_thickness_cp": values["wing.skin_thickness_cp"],  # [m]
+        "t_over_c_cp": np.array([0.12]),
+        "original_wingbox_airfoil_t_over_c": 0.12,
+        "sweep": 30,
+        "taper": 0.3,
+        "AR": 8,
+        # Aerodynamic deltas.
+        "CL0": 0.0,  # CL delta
+        "CD0": 0.0078,  # CD delta
+        "with_viscous": True,  # if true, compute viscous drag
+        "with_wave": True,  # if true, compute wave drag
+        # Airfoil properties for viscous drag calculation
+        "k_lam": 0.03,  # fraction of chord with laminar
+        # flow, used for viscous drag
+        "c_max_t": 0.4,  # chordwise location of maximum thickness
+        # Structural values are based on aluminum 7075
+        "E": 73.1e9,  # [Pa] Young's modulus
+        "G": (73.1e9 / 2 / 1.33),  # [Pa] shear modulus (calculated using E and the Poisson's ratio here)
+        "yield": (420.0e6 / 1.5),  # [Pa] allowable yield stress
+        "mrho": 2.78e3,  # [kg/m^3] material density
+        "strength_factor_for_upper_skin": 1.0,  # the yield stress is multiplied by this factor for the upper skin
+        "wing_weight_ratio": 1.25,
+        "exact_failure_constraint": False,  # if false, use KS function
+        "struct_weight_relief": True,
+        "distributed_fuel_weight": True,
+        "n_point_masses": 1,  # number of point masses in the system; in this case, the engine (omit option if no point masses)
+        "fuel_density": 803.0,  # [kg/m^3] fuel density (only needed if the fuel-in-wing volume constraint is used)
+        "Wf_reserve": 1125.0,  # [kg] reserve fuel mass
+        "monotonic_con_twist_cp": True,
+    }
+
+    mesh = rect_mesh(2, 7, root_chord=1.5, offset=(10, 0.0, 1.0))
+
+    surf_dict2 = {
+        # Wing definition
+        "name": "tail",  # give the surface some name
+        "symmetry": True,  # if True, model only one half of the lifting surface
+        "S_ref_type": "projected",  # how we compute the wing area,
+        # can be 'wetted' or 'projected'
+        "mesh": mesh,
+        "span": 10,
+        "taper": 0.7,
+        "root_chord": 1.5,
+        "fem_model_type": "wingbox",  # 'wingbox' or 'tube'
+        "data_x_upper": airfoil["upper_x"],
+        "data_x_lower": airfoil["lower_x"],
+        "data_y_upper": airfoil["upper_y"],
+        "data_y_lower": airfoil["lower_y"],
+        "twist_cp": values["tail.twist_cp"],  # [deg]
+        "spar_thickness_cp": values["tail.spar_thickness_cp"],  # [m]
+        "skin_thickness_cp": values["tail.skin_thickness_cp"],  # [m]
+        "t_over_c_cp": np.array([0.12]),
+        "original_wingbox_airfoil_t_over_c": 0.12,
+        # Aerodynamic deltas.
+        "CL0": 0.0,  # CL delta
+        "CD0": 0.0078,  # CD delta
+        "with_viscous": True,  # if true, compute viscous drag
+        "with_wave": True,  # if true, compute wave drag
+        # Airfoil properties for viscous drag calculation
+        "k_lam": 0.03,  # fraction of chord with laminar
+        # flow, used for viscous drag
+        "c_max_t": 0.4,  # chordwise location of maximum thickness
+        # Structural values are based on aluminum 7075
+        "E": 73.1e9,  # [Pa] Young's modulus
+        "G": (73.1e9 / 2 / 1.33),  # [Pa] shear modulus (calculated using E and the Poisson's ratio here)
+        "yield": (420.0e6 / 1.5),  # [Pa] allowable yield stress
+        "mrho": 2.78e3,  # [kg/m^3] material density
+        "strength_factor_for_upper_skin": 1.0,  # the yield stress is multiplied by this factor for the upper skin
+        "wing_weight_ratio": 1.25,
+        "struct_weight_relief": True,
+        "distributed_fuel_weight": False,
+        "exact_failure_constraint": False,  # if false, use KS function
+        "monotonic_con_twist_cp": True,
+    }
+
+    return [surf_dict, surf_dict2]
+
+
+def build_surfaces(model, num_x, num_y, span_cos_spacing=None):
+    """
+    Creates the surface dictionaries of the given model.
+
+    Parameters
+    ----------
+    model : str
+        Name of the model, "CRJ700" or "mesh_study".
+    num_x : int
+        Number of chordwise mesh points of the wing.
+    num_y : int
+        Number of spanwise mesh points of the wing.
+    span_cos_spacing : float or None
+        Spanwise cosine spacing of the meshes (CRJ700 model only).
+
+    Returns
+    -------
+    surfaces : list
+        Wing and tail surface dictionaries.
+    """
+    if model == "CRJ700":
+        return crj700_surfaces(num_x, num_y, span_cos_spacing)
+    if model == "mesh_study":
+        return mesh_study_surfaces(num_x, num_y)
+    raise ValueError("Unknown model '{}', expected 'CRJ700' or 'mesh_study'".format(model))
+
+
+def build_problem(model="CRJ700", num_x=5, num_y=21, span_cos_spacing=None, design_vars=FINAL_DESIGN_VARS,
+                  constraints=FINAL_CONSTRAINTS, flight_points=(CRUISE, MANEUVER), recorder=None, recording="post",
+                  parallel_points=False, coupled_solver="nlbgs", profile=False, objective="AS_point_0.fuelburn",
+                  coloring=False, checkpoint=None, checkpoint_every=1):
+    """
+    Builds and sets up the aerostructural problem of a wing and tail configuration.
+
+    The problem is returned configured but not run, so the caller is free to
+    call run_model or run_driver on it.
+
+    Parameters
+    ----------
+    model : str
+        Name of the model, "CRJ700" or "mesh_study".
+    num_x : int
+        Number of chordwise mesh points of the wing.
+    num_y : int
+        Number of spanwise mesh points of the wing.
+    span_cos_spacing : float or None
+        Spanwise cosine spacing of the meshes (CRJ700 model only).
+    design_vars : tuple of str
+        Names of the design variables, taken from DESIGN_VARS[model]. The
+        angle of attack of point i is alpha_name(i), and the points without
+        their own entry share the options of the first ones.
+    constraints : tuple of str
+        Names of the constraints, taken from CONSTRAINTS[model], per point
+        (e.g. "AS_point_3.wing_perf.failure").
+    flight_points : tuple of FlightPoint
+        Flight conditions of the points AS_point_0, AS_point_1, ... The first
+        one is the design cruise point, on which the fuel burn, the section
+        Cl and the fuel volume and consistency constraints are evaluated.
+    recorder : str, om.CaseRecorder or None
+        File name of a SqliteRecorder, or an existing recorder to share
+        between problems. It is attached to the driver and to the problem.
+        If None, nothing is recorded.
+    recording : str
+        Name of the recording profile, a key of RECORDING_PROFILES.
+    parallel_points : bool
+        If True, the flight points are placed in a ParallelGroup named
+        "points", so under MPI (e.g. mpirun -n 2) each point and its adjoint
+        are solved on its own ranks. Without MPI they run one after the other.
+        The point variables keep their AS_point_N names.
+    coupled_solver : str or tuple of str
+        Solver strategy of the aerostructural coupled group, a key of
+        COUPLED_SOLVERS, either for every point or one per point.
+    profile : bool
+        If True, the component methods are instrumented and their calls and
+        times are accumulated in prob.profile, a profiling.ComponentProfile.
+    objective : str
+        Name of the objective, e.g. the fuel burn of another point.
+    coloring : bool
+        If True, the driver colors the total Jacobian, so a gradient costs
+        one linear solve per color instead of one per design variable or
+        response entry. The coloring is computed on the first gradient and
+        cached in coloring_dir(...), from which later problems of the same
+        configuration load it instead of computing it again.
+    checkpoint : str or None
+        If given, a checkpoint.CheckpointRecorder saves the design variables
+        and coupled states to this .npz file, to resume the optimization with
+        checkpoint.resume if the run is interrupted.
+    checkpoint_every : int
+        Number of model evaluations between checkpoints.
+
+    Returns
+    -------
+    prob : om.Problem
+        The set up problem.
+    """
+    if len(flight_points) == 0:
+        raise ValueError("Expected at least one flight point")
+
+    surfaces = build_surfaces(model, num_x, num_y, span_cos_spacing)
+    surf_dict = surfaces[0]
+    values = INITIAL_VALUES[model]
+
+    # Create the problem and assign the model group. The automatic reports are
+    # disabled: every problem rewrites reports/<problem name>/, so the problems
+    # built by the workers of a process pool would delete each other's files.
+    prob = om.Problem(reports=False)
+    if coloring:
+        prob.options["coloring_dir"] = coloring_dir(model, num_x, num_y, design_vars, constraints, len(flight_points),
+                                                    objective)
+
+    # Add problem information as an independent variables component
+    Mach_number = np.array([point.Mach_number for point in flight_points])
+    speed_of_sound = np.array([point.speed_of_sound for point in flight_points])
+    rho = np.array([point.rho for point in flight_points])
+    mu = np.array([point.mu for point in flight_points])
+
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output("Mach_number", val=Mach_number)
+    indep_var_comp.add_output("v", val=Mach_number * speed_of_sound, units="m/s")
+    indep_var_comp.add_output("re", val=rho * speed_of_sound * Mach_number * 1.0 / mu, units="1/m")
+    indep_var_comp.add_output("rho", val=rho, units="kg/m**3")
+    indep_var_comp.add_output("speed_of_sound", val=speed_of_sound, units="m/s")
+
+    indep_var_comp.add_output("CT", val=0.38 / 3600, units="1/s")
+    indep_var_comp.add_output("R", val=3.120e6, units="m")
+    indep_var_comp.add_output("W0_without_point_masses", val=19731 + surf_dict["Wf_reserve"], units="kg")
+
+    indep_var_comp.add_output("load_factor", val=np.array([point.load_factor for point in flight_points]))
+    for i in range(len(flight_points)):
+        indep_var_comp.add_output(alpha_name(i), val=values.get(alpha_name(i), values["alpha"]), units="deg")
+    indep_var_comp.add_output("sweep", values["sweep"], units="deg")
+    indep_var_comp.add_output("span", values["span"], units="m")
+    indep_var_comp.add_output("tail_span", values["tail_span"], units="m")
+    indep_var_comp.add_output("taper", values["taper"])
+    indep_var_comp.add_output("tail_taper", values["tail_taper"])
+    prob.model.connect("sweep", "wing.sweep")
+    prob.model.connect("span", "wing.geometry.span")
+    prob.model.connect("tail_span", "tail.geometry.span")
+    prob.model.connect("taper", "wing.taper")
+    prob.model.connect("tail_taper", "tail.taper")
+
+    indep_var_comp.add_output("empty_cg", val=values["empty_cg"], units="m")
+
+    indep_var_comp.add_output("fuel_mass", val=values["fuel_mass"], units="kg")
+
+    indep_var_comp.add_output("point_masses", val=values["point_masses"], units="kg")
+    indep_var_comp.add_output("point_mass_locations", val=values["point_mass_locations"], units="m")
+
+    prob.model.add_subsystem("prob_vars", indep_var_comp, promotes=["*"])
+
+    # Compute the actual W0 to be used within OAS based on the sum of the point mass and other W0 weight
+    prob.model.add_subsystem("W0_comp", WeightBuildUp(n_point_masses=surf_dict["n_point_masses"]), promotes=["*"])
+
+    # Loop over each surface in the surfaces list
+    for surface in surfaces:
+        # Get the surface name and create a group to contain components
+        # only for this surface
+        name = surface["name"]
+
+        aerostruct_group = AerostructGeometry(surface=surface)
+
+        # Add groups to the problem with the name of the surface.
+        prob.model.add_subsystem(name, aerostruct_group)
+
+    # The points only share the geometry outputs, so they can be solved concurrently
+    if parallel_points:
+        points = prob.model.add_subsystem("points", om.ParallelGroup(), promotes=["*"])
+    else:
+        points = prob.model
+
+    # Loop through and add a certain number of aerostruct points
+    for i in range(len(flight_points)):
+        point_name = "AS_point_{}".format(i)
+        # Connect the parameters within the model for each aero point
+
+        # Create the aerostruct point group and add it to the model
+        AS_point = AerostructPoint(surfaces=surfaces, internally_connect_fuelburn=False)
+
+        points.add_subsystem(point_name, AS_point)
+
+        # Connect flow properties to the analysis point
+        prob.model.connect("v", point_name + ".v", src_indices=[i])
+        prob.model.connect("Mach_number", point_name + ".Mach_number", src_indices=[i])
+        prob.model.connect("re", point_name + ".re", src_indices=[i])
+        prob.model.connect("rho", point_name + ".rho", src_indices=[i])
+        prob.model.connect("CT", point_name + ".CT")
+        prob.model.connect("R", point_name + ".R")
+        prob.model.connect("W0", point_name + ".W0")
+        prob.model.connect("speed_of_sound", point_name + ".speed_of_sound", src_indices=[i])
+        prob.model.connect("empty_cg", point_name + ".empty_cg")
+        prob.model.connect("load_factor", point_name + ".load_factor", src_indices=[i])
+        prob.model.connect("fuel_mass", point_name + ".total_perf.L_equals_W.fuelburn")
+        prob.model.connect("fuel_mass", point_name + ".total_perf.CG.fuelburn")
+        prob.model.connect("load_factor", point_name + ".coupled.load_factor", src_indices=[i])
+        prob.model.connect(alpha_name(i), point_name + ".alpha")
+
+        for surface in surfaces:
+            name = surface["name"]
+
+            com_name = point_name + "." + name + "_perf."
+            prob.model.connect(
+                name + ".local_stiff_transformed", point_name + ".coupled." + name + ".local_stiff_transformed"
+            )
+            prob.model.connect(name + ".nodes", point_name + ".coupled." + name + ".nodes")
+
+            # Connect aerodynamic mesh to coupled group mesh
+            prob.model.connect(name + ".mesh", point_name + ".coupled." + name + ".mesh")
+            if surface["struct_weight_relief"]:
+                prob.model.connect(name + ".element_mass", point_name + ".coupled." + name + ".element_mass")
+
+            # Connect performance calculation variables
+            prob.model.connect(name + ".nodes", com_name + "nodes")
+            prob.model.connect(name + ".cg_location", point_name + "." + "total_perf." + name + "_cg_location")
+            prob.model.connect(name + ".structural_mass", point_name + "." + "total_perf." + name + "_structural_mass")
+
+            # Connect wingbox properties to von Mises stress calcs
+            prob.model.connect(name + ".Qz", com_name + "Qz")
+            prob.model.connect(name + ".J", com_name + "J")
+            prob.model.connect(name + ".A_enc", com_name + "A_enc")
+            prob.model.connect(name + ".htop", com_name + "htop")
+            prob.model.connect(name + ".hbottom", com_name + "hbottom")
+            prob.model.connect(name + ".hfront", com_name + "hfront")
+            prob.model.connect(name + ".hrear", com_name + "hrear")
+
+            prob.model.connect(name + ".spar_thickness", com_name + "spar_thickness")
+            prob.model.connect(name + ".t_over_c", com_name + "t_over_c")
+
+            coupled_name = point_name + ".coupled." + name
+            if name == "wing":
+                prob.model.connect("point_masses", coupled_name + ".point_masses")
+                prob.model.connect("point_mass_locations", coupled_name + ".point_mass_locations")
+
+    prob.model.add_subsystem("Cl", LiftCoeff2D(surface=surf_dict), promotes_outputs=["Cl"])
+    prob.model.connect("AS_point_0.coupled.aero_states.wing_sec_forces", "Cl.sec_forces")
+    prob.model.connect("AS_point_0.coupled.wing.widths", "Cl.widths")
+    prob.model.connect("AS_point_0.coupled.wing.lengths", "Cl.chords")
+    prob.model.promotes("Cl", inputs=["alpha"])
+    prob.model.promotes("Cl", inputs=["rho"], src_indices=([0]))
+    prob.model.promotes("Cl", inputs=["v"], src_indices=([0]))
+
+    # Here we add the fuel volume constraint component to the model
+    prob.model.add_subsystem("fuel_vol_delta", WingboxFuelVolDelta(surface=surf_dict))
+    prob.model.connect("wing.struct_setup.fuel_vols", "fuel_vol_delta.fuel_vols")
+    prob.model.connect("AS_point_0.fuelburn", "fuel_vol_delta.fuelburn")
+
+    if surf_dict["distributed_fuel_weight"]:
+        for i in range(len(flight_points)):
+            point_name = "AS_point_{}".format(i)
+            prob.model.connect("wing.struct_setup.fuel_vols", point_name + ".coupled.wing.struct_states.fuel_vols")
+            prob.model.connect("fuel_mass", point_name + ".coupled.wing.struct_states.fuel_mass")
+
+    prob.model.add_subsystem("fuel_diff", FuelDiff(), promotes_inputs=["fuel_mass"], promotes_outputs=["fuel_diff"])
+    prob.model.connect("AS_point_0.fuelburn", "fuel_diff.fuelburn")
+
+    prob.model.add_subsystem("sweep_constraint", SweepTimesSpan(), promotes_inputs=["sweep", "span"], promotes_outputs=["sweep_times_span"])
+
+    #############################################################################################################################################
+
+    prob.model.add_objective(objective, scaler=1e-5)
+    for name in design_vars:
+        prob.model.add_design_var(name, **_point_options(DESIGN_VARS[model], name))
+    for name in constraints:
+        prob.model.add_constraint(name, **_point_options(CONSTRAINTS[model], name))
+
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options["optimizer"] = "SLSQP"  # compared with the alternatives in optimizer_study.py
+    prob.driver.options["tol"] = 1e-9
+
+    # The derivative mode is left to "auto", so OpenMDAO picks forward or
+    # reverse (or both, when colored) from the design variable and response sizes
+    if coloring:
+        prob.driver.declare_coloring()
+        if os.path.exists(os.path.join(prob.options["coloring_dir"], "total_coloring.pkl")):
+            prob.driver.use_fixed_coloring(os.path.join(prob.options["coloring_dir"], "total_coloring.pkl"))
+
+    if recorder is not None:
+        if isinstance(recorder, str):
+            recorder = om.SqliteRecorder(recorder)
+        prob.driver.add_recorder(recorder)
+        prob.add_recorder(recorder)
+
+        for recording_options in (prob.driver.recording_options, prob.recording_options):
+            recording_options["record_objectives"] = True
+            recording_options["record_constraints"] = True
+            recording_options["record_desvars"] = True
+            recording_options.update(RECORDING_PROFILES[recording])
+
+    if checkpoint is not None:
+        prob.driver.add_recorder(CheckpointRecorder(prob, checkpoint, checkpoint_every))
+        if recorder is None:
+            # The checkpoint reads its values from the problem, not from the recorded data
+            prob.driver.recording_options.update(RECORDING_PROFILES["minimal"])
+
+    # Set up the problem
+    prob.setup()
+
+    if isinstance(coupled_solver, str):
+        coupled_solver = (coupled_solver,) * len(flight_points)
+    if len(coupled_solver) != len(flight_points):
+        raise ValueError("Expected one coupled solver per flight point, got {}".format(len(coupled_solver)))
+
+    # change solvers of the aerostructural coupled group and its adjoint
+    for i, strategy in enumerate(coupled_solver):
+        point = point_group(prob, i)
+        if point is not None:
+            COUPLED_SOLVERS[strategy](point.coupled)
+
+    if profile:
+        prob.profile = profile_components(prob)
+
+    return prob
+
+
+def num_points(prob):
+    """
+    Returns the number of flight points of a problem built by build_problem.
+    """
+    return prob.get_val("Mach_number", get_remote=True).size
+
+
+def coloring_dir(model, num_x, num_y, design_vars, constraints, num_points, objective):
+    """
+    Returns the directory of the total coloring of a problem configuration.
+
+    The sparsity of the total Jacobian only depends on the mesh, the design
+    variables, the responses and the number of flight points, so these name
+    the directory.
+    """
+    key = repr((sorted(design_vars), sorted(constraints), num_points, objective)).encode()
+    return os.path.join(COLORING_DIR, "{}_{}x{}_{}".format(model, num_x, num_y, hashlib.sha256(key).hexdigest()[:12]))
+
+
+def coloring_report(prob):
+    """
+    Prints the size of the total Jacobian and the linear solves per gradient with and without coloring.
+
+    Parameters
+    ----------
+    prob : om.Problem
+        A problem built with coloring=True, after its first gradient.
+    """
+    num_wrt = sum(meta["size"] for meta in prob.model.get_design_vars().values())
+    num_of = sum(meta["size"] for meta in prob.model.get_responses().values())
+
+    # Without coloring, "auto" solves once per column in forward mode or per row in reverse mode
+    mode = "fwd" if num_wrt <= num_of else "rev"
+    uncolored = min(num_wrt, num_of)
+
+    filename = os.path.join(prob.options["coloring_dir"], "total_coloring.pkl")
+    if prob.comm.rank != 0:
+        return
+
+    print("Total Jacobian:", num_of, "responses x", num_wrt, "design variables")
+    print("Without coloring:", uncolored, "linear solves per gradient,", mode, "mode")
+    if not os.path.exists(filename):
+        print("No total coloring computed yet in", filename)
+        return
+
+    coloring = Coloring.load(filename)
+    fwd_solves = coloring.total_solves(fwd=True, rev=False)
+    rev_solves = coloring.total_solves(fwd=False, rev=True)
+    colored = fwd_solves + rev_solves
+    print("With coloring:", colored, "linear solves per gradient ({} fwd, {} rev)".format(fwd_solves, rev_solves))
+    print("Saved:", uncolored - colored, "linear solves per gradient")
+
+
+def point_group(prob, i):
+    """
+    Returns the AerostructPoint group of a flight point.
+
+    Parameters
+    ----------
+    prob : om.Problem
+        A problem built by build_problem.
+    i : int
+        Index of the flight point.
+
+    Returns
+    -------
+    point : AerostructPoint or None
+        The point group, or None if it is not local to this MPI rank.
+    """
+    parent = getattr(prob.model, "points", prob.model)
+    return getattr(parent, "AS_point_{}".format(i), None)
+
+
+def _bind_options(model, options):
+    """
+    Binds the options of a problem to build_problem, with the defaults and lists as tuples, as memoization key.
+    """
+    arguments = inspect.signature(build_problem).bind(model, **options)
+    arguments.apply_defaults()
+    for name, val in arguments.arguments.items():
+        if isinstance(val, list):
+            arguments.arguments[name] = tuple(val)
+    return arguments
+
+
+def find_problem(model="CRJ700", **options):
+    """
+    Returns the memoized problem of a configuration, without building it.
+
+    Parameters
+    ----------
+    model : str
+        Name of the model, "CRJ700" or "mesh_study".
+    **options
+        Any other argument of build_problem, as given to get_problem.
+
+    Returns
+    -------
+    prob : om.Problem or None
+        The problem, as left by its last run, or None if get_problem has not
+        built it in this process.
+    """
+    return _problem_cache.get(tuple(_bind_options(model, options).arguments.items()))
+
+
+def forget_problem(model="CRJ700", **options):
+    """
+    Drops the memoized problem of a configuration, closing its recorders, so the next get_problem builds it anew.
+
+    Parameters
+    ----------
+    model : str
+        Name of the model, "CRJ700" or "mesh_study".
+    **options
+        Any other argument of build_problem, as given to get_problem.
+    """
+    prob = _problem_cache.pop(tuple(_bind_options(model, options).arguments.items()), None)
+    if prob is not None:
+        prob.cleanup()
+
+
+def get_problem(model="CRJ700", initial_values=None, **options):
+    """
+    Returns a set up problem for the given configuration, building it only once per process.
+
+    Problems are memoized on every argument of build_problem, which are all
+    the ones that change the model structure, so repeated analyses of the same
+    configuration skip model construction and setup. The initial values are
+    applied on every call, so a reused problem starts from the same inputs as
+    a freshly built one (the coupled states are kept, which only serves as a
+    better initial guess).
+
+    Parameters
+    ----------
+    model : str
+        Name of the model, "CRJ700" or "mesh_study".
+    initial_values : dict or None
+        Values overriding INITIAL_VALUES[model], keyed by promoted name.
+    **options
+        Any other argument of build_problem.
+
+    Returns
+    -------
+    prob : om.Problem
+        The set up problem.
+    """
+    arguments = _bind_options(model, options)
+    key = tuple(arguments.arguments.items())
+
+    prob = _problem_cache.get(key)
+    if prob is None:
+        prob = build_problem(*arguments.args, **arguments.kwargs)
+        _problem_cache[key] = prob
+
+    values = dict(INITIAL_VALUES[model])
+    for i in range(2, len(arguments.arguments["flight_points"])):
+        values[alpha_name(i)] = values["alpha"]
+    if initial_values is not None:
+        values.update(initial_values)
+    for name, val in values.items():
+        prob.set_val(name, val)
+
+    return prob
+
+
+def clear_problem_cache():
+    """
+    Forgets every memoized problem, closing their recorders.
+    """
+    for prob in _problem_cache.values():
+        prob.cleanup()
+    _problem_cache.clear()
+
+
+def constraint_violation(case, metadata):
+    """
+    Returns the largest constraint violation of a recorded driver case.
+
+    Parameters
+    ----------
+    case : Case
+        A driver case.
+    metadata : dict
+        Variable metadata of the recording, CaseReader.problem_metadata["variables"].
+
+    Returns
+    -------
+    violation : float
+        Largest violation of a bound or equality, 0 if the case is feasible.
+    """
+    # The recorded metadata is keyed by source name, while the case returns the
+    # constraints by promoted name (or alias), which the metadata keeps as "name"
+    by_name = dict(metadata)
+    for meta in metadata.values():
+        for key in ("name", "alias"):
+            if meta.get(key) is not None:
+                by_name.setdefault(meta[key], meta)
+
+    return max_violation(case.get_constraints(), by_name)
+
+
+def max_violation(constraints, metadata):
+    """
+    Returns the largest violation of a set of constraint values.
+
+    Parameters
+    ----------
+    constraints : dict
+        Constraint values, keyed by name.
+    metadata : dict
+        Metadata of the constraints (or of all the variables), keyed by the
+        same names, with their lower, upper and equals.
+
+    Returns
+    -------
+    violation : float
+        Largest violation of a bound or equality, 0 if all are satisfied.
+    """
+    violation = 0.0
+    for name, val in constraints.items():
+        meta = metadata.get(name)
+        if meta is None:
+            continue
+        if meta.get("equals") is not None:
+            violation = max(violation, np.max(np.abs(val - meta["equals"])))
+            continue
+        if meta.get("lower") is not None:
+            violation = max(violation, np.max(meta["lower"] - val))
+        if meta.get("upper") is not None:
+            violation = max(violation, np.max(val - meta["upper"]))
+
+    return violation
+
+
+def load_driver_case(filename, case="last", tol=1e-6):
+    """
+    Reads a driver case from a recorder file.
+
+    Parameters
+    ----------
+    filename : str
+        SqliteRecorder file of a previous run.
+    case : str
+        "last" for the last driver iteration, or "best" for the feasible case
+        (within tol) with the lowest objective. If no case is feasible, "best"
+        returns the least infeasible one.
+    tol : float
+        Constraint violation below which a case is considered feasible.
+
+    Returns
+    -------
+    case : Case
+        The selected driver case, with its values loaded in memory.
+    """
+    cr = om.CaseReader(filename)
+    case_ids = cr.list_cases("driver", recurse=False, out_stream=None)
+    if len(case_ids) == 0:
+        raise ValueError("No driver cases recorded in '{}'".format(filename))
+
+    if case == "last":
+        return cr.get_case(case_ids[-1])
+    if case != "best":
+        raise ValueError("Unknown case '{}', expected 'last' or 'best'".format(case))
+
+    metadata = cr.problem_metadata["variables"]
+    best_case = None
+    best_key = None
+    for case_id in case_ids:
+        driver_case = cr.get_case(case_id)
+        violation = constraint_violation(driver_case, metadata)
+        objective = np.sum(list(driver_case.get_objectives().values()))
+        # Feasible cases are ranked by objective, infeasible ones after them by violation
+        key = (0.0, objective) if violation <= tol else (violation, objective)
+        if best_key is None or key < best_key:
+            best_case = driver_case
+            best_key = key
+
+    return best_case
+
+
+def warm_start(prob, filename, case="last"):
+    """
+    Initialises a problem from a driver case of a previous run.
+
+    The design variables and every other recorded variable are loaded,
+    including the coupled states when the run used the "restart" (or "full")
+    recording profile, so they serve as initial guesses of the coupled solve.
+
+    The case is read before final_setup, so filename can also be the file the
+    problem records to (which is overwritten when the recording starts).
+
+    Parameters
+    ----------
+    prob : om.Problem
+        A problem returned by get_problem, not yet run.
+    filename : str
+        SqliteRecorder file of the previous run.
+    case : str
+        "last" or "best", see load_driver_case.
+
+    Returns
+    -------
+    case : Case
+        The loaded driver case.
+    """
+    driver_case = load_driver_case(filename, case)
+
+    prob.final_setup()
+    prob.load_case(driver_case)
+
+    return driver_case
+
+
+def parse_script_args(description):
+    """
+    Parses the command line options shared by the CRJ700 optimization scripts.
+
+    Parameters
+    ----------
+    description : str
+        Description of the script shown by --help.
+
+    Returns
+    -------
+    args : argparse.Namespace
+        The parsed options.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--recording", choices=sorted(RECORDING_PROFILES), default="post",
+                        help="variables recorded to aerostruct.db at every driver iteration")
+    parser.add_argument("--warm-start", metavar="FILE", default=None,
+                        help="initialise the design variables and coupled states from a previous recording")
+    parser.add_argument("--warm-start-case", choices=["last", "best"], default="last",
+                        help="driver case used to warm start, the last one or the best feasible one")
+    parser.add_argument("--parallel-points", action="store_true",
+                        help="solve the flight points in a ParallelGroup (run with mpirun -n 2)")
+    parser.add_argument("--coupled-solver", choices=sorted(COUPLED_SOLVERS), default="nlbgs",
+                        help="solver strategy of the aerostructural coupled groups")
+    parser.add_argument("--coloring", action="store_true",
+                        help="color the total Jacobian (cached in {}/) and report the linear solves saved".format(COLORING_DIR))
+    parser.add_argument("--profile", metavar="FILE", default=None,
+                        help="profile the components, print a report and write folded stacks for a flamegraph to FILE")
+    parser.add_argument("--checkpoint", metavar="FILE", default=None,
+                        help="save the design variables and coupled states to FILE (.npz) during the optimization")
+    parser.add_argument("--checkpoint-every", type=int, default=1, metavar="N",
+                        help="model evaluations between checkpoints")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the checkpoint FILE, if it exists, instead of the initial values")
+
+    args = parser.parse_args()
+    if args.resume and args.checkpoint is None:
+        parser.error("--resume requires --checkpoint")
+
+    return args
+
+
+def print_results(prob):
+    """
+    Prints the main results of a CRJ700 analysis or optimization.
+
+    Under MPI the values are gathered from the ranks that own them and only
+    rank 0 prints.
+
+    Parameters
+    ----------
+    prob : om.Problem
+        A problem built by build_problem that has been run.
+    """
+    surf_dict = prob.model.wing.options["surface"]
+    points = range(num_points(prob))
+
+    alpha_labels = ["alpha =", "alpha 2.5g ="] + ["alpha of AS_point_{} =".format(i) for i in points[2:]]
+    results = [(alpha_labels[i], alpha_name(i)) for i in points] + [
+        ("sweep =", "wing.geometry.sweep"),
+        ("span =", "wing.geometry.span"),
+        ("tail span =", "tail.geometry.span"),
+        ("thickness over chord =", "wing.geometry.t_over_c_cp"),
+        ("twist_cp =", "wing.twist_cp"),
+        ("tail twist_cp =", "tail.twist_cp"),
+        ("spar thickness =", "wing.spar_thickness_cp"),
+        ("skin thickness =", "wing.skin_thickness_cp"),
+        ("point mass locations =", "point_mass_locations"),
+        ("C_D =", "AS_point_0.wing_perf.CD"),
+        ("C_L =", "AS_point_0.wing_perf.CL"),
+        ("tail C_D =", "AS_point_0.tail_perf.CD"),
+        ("tail C_L =", "AS_point_0.tail_perf.CL"),
+        ("CM vector =", "AS_point_0.CM"),
+        ("CG vector =", "AS_point_0.cg"),
+        ("Cl of sections =", "Cl"),
+    ] + [
+        ("AS_point_{}.L_equals_W =".format(i), "AS_point_{}.L_equals_W".format(i)) for i in points
+    ] + [
+        ("chord =", "AS_point_0.coupled.wing.lengths"),
+        ("tail chord =", "AS_point_0.coupled.tail.lengths"),
+        ("Constraint = ", "sweep_constraint.sweep_times_span"),
+    ]
+
+    # get_remote is collective, so every rank fetches every value
+    fuelburn = prob.get_val("AS_point_0.fuelburn", get_remote=True)
+    structural_mass = prob.get_val("wing.structural_mass", get_remote=True)
+    values = [prob.get_val(name, get_remote=True) for label, name in results]
+
+    if prob.comm.rank != 0:
+        return
+
+    print("The fuel burn value is", fuelburn[0], "[kg]")
+    print(
+        "The wingbox mass (excluding the wing_weight_ratio) is",
+        structural_mass[0] / surf_dict["wing_weight_ratio"],
+        "[kg]",
+    )
+
+    # Output the results
+    for (label, name), val in zip(results, values):
+        print(label, val)
+
+
+def write_profile(prob, filename):
+    """
+    Prints the component profile of a problem built with profile=True and writes its folded stacks.
+
+    Under MPI every rank profiles its own components, so each rank writes
+    filename with its rank appended.
+
+    Parameters
+    ----------
+    prob : om.Problem
+        A problem built by build_problem with profile=True that has been run.
+    filename : str
+        Path of the folded stacks file.
+    """
+    if prob.comm.size > 1:
+        filename = "{}.{}".format(filename, prob.comm.rank)
+    else:
+        prob.profile.report()
+    prob.profile.write_folded(filename)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - CRJ700 Model Benchmark
+
+ Times the phases of a CRJ700 analysis (setup, final_setup, run_model and
+ compute_totals) over a num_x/num_y grid, with warm-up runs and repeated
+ samples, and writes the median and interquartile range of every phase to
+ a JSON file. A stored result can be given as baseline to flag regressions,
+ e.g. after upgrading OpenAeroStruct or OpenMDAO.
+
+ Usage:
+   python benchmark.py --output baseline.json
+   python benchmark.py --output new.json --baseline baseline.json
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+import openaerostruct
+import openmdao
+
+from CRJ700_problem import COUPLED_SOLVERS, build_problem
+
+PHASES = ["setup", "final_setup", "run_model", "compute_totals"]
+
+
+def time_phases(num_x, num_y, coupled_solver="nlbgs"):
+    """
+    Builds a new CRJ700 problem and times each phase of one analysis.
+
+    The problem is not taken from the get_problem cache, so the setup is
+    always paid. "setup" includes the model construction.
+
+    Parameters
+    ----------
+    num_x : int
+        Number of chordwise mesh points.
+    num_y : int
+        Number of spanwise mesh points.
+    coupled_solver : str
+        Key of COUPLED_SOLVERS.
+
+    Returns
+    -------
+    times : dict
+        Wall time of each phase [s].
+    """
+    times = {}
+
+    start = time.perf_counter()
+    prob = build_problem("CRJ700", num_x=num_x, num_y=num_y, coupled_solver=coupled_solver)
+    times["setup"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prob.final_setup()
+    times["final_setup"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prob.run_model()
+    times["run_model"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prob.compute_totals()
+    times["compute_totals"] = time.perf_counter() - start
+
+    prob.cleanup()
+
+    return times
+
+
+def benchmark_case(num_x, num_y, repeats=5, warmup=1, coupled_solver="nlbgs"):
+    """
+    Times the phases of one mesh several times and summarizes them.
+
+    Parameters
+    ----------
+    num_x : int
+        Number of chordwise mesh points.
+    num_y : int
+        Number of spanwise mesh points.
+    repeats : int
+        Number of timed samples.
+    warmup : int
+        Number of untimed runs before the samples.
+    coupled_solver : str
+        Key of COUPLED_SOLVERS.
+
+    Returns
+    -------
+    case : dict
+        Mesh size and, for every phase, the median, interquartile range,
+        minimum and samples of the wall time [s].
+    """
+    for i in range(warmup):
+        time_phases(num_x, num_y, coupled_solver)
+
+    samples = {phase: [] for phase in PHASES}
+    for i in range(repeats):
+        gc.collect()
+        times = time_phases(num_x, num_y, coupled_solver)
+        for phase in PHASES:
+            samples[phase].append(times[phase])
+
+    phases = {}
+    for phase in PHASES:
+        q1, median, q3 = np.percentile(samples[phase], [25, 50, 75])
+        phases[phase] = {
+            "median": median,
+            "iqr": q3 - q1,
+            "min": min(samples[phase]),
+            "samples": samples[phase],
+        }
+
+    return {"num_x": num_x, "num_y": num_y, "phases": phases}
+
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    Compares benchmark results against a baseline.
+
+    A phase regresses when its median exceeds the baseline median by more
+    than the relative tolerance and by more than the baseline IQR (so noisy
+    phases are not flagged by chance).
+
+    Parameters
+    ----------
+    results : dict
+        Results written by this script.
+    baseline : dict
+        Stored results to compare against.
+    tolerance : float
+        Allowed relative slowdown of a median.
+
+    Returns
+    -------
+    regressions : list of str
+        Description of every regressed phase.
+    """
+    baseline_cases = {(case["num_x"], case["num_y"]): case for case in baseline["cases"]}
+
+    regressions = []
+    for case in results["cases"]:
+        reference = baseline_cases.get((case["num_x"], case["num_y"]))
+        if reference is None:
+            continue
+
+        for phase in PHASES:
+            new = case["phases"][phase]["median"]
+            old = reference["phases"][phase]["median"]
+            ratio = new / old
+            print(case["num_x"], case["num_y"], phase, "median", new, "baseline", old, "ratio", ratio, sep=" | ")
+            if ratio > 1 + tolerance and new - old > reference["phases"][phase]["iqr"]:
+                regressions.append("num_x={} num_y={} {}: {:.3f}s -> {:.3f}s".format(
+                    case["num_x"], case["num_y"], phase, old, new))
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the CRJ700 model across mesh sizes")
+    parser.add_argument("--num_x", type=int, nargs="+", default=[2, 5])
+    parser.add_argument("--num_y", type=int, nargs="+", default=[5, 11, 21])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--coupled-solver", choices=sorted(COUPLED_SOLVERS), default="nlbgs")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file the results are written to")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="relative slowdown of a median flagged as a regression")
+    args = parser.parse_args()
+
+    results = {
+        "metadata": {
+            "date": datetime.datetime.now().isoformat(),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "openmdao": openmdao.__version__,
+            "openaerostruct": openaerostruct.__version__,
+            "coupled_solver": args.coupled_solver,
+            "repeats": args.repeats,
+            "warmup": args.warmup,
+        },
+        "cases": [],
+    }
+
+    for num_x in args.num_x:
+        for num_y in args.num_y:
+            case = benchmark_case(num_x, num_y, args.repeats, args.warmup, args.coupled_solver)
+            results["cases"].append(case)
+            print(num_x, num_y, *["{} {:.4f} (IQR {:.4f})".format(phase, case["phases"][phase]["median"],
+                                                                  case["phases"][phase]["iqr"])
+                                  for phase in PHASES], sep=" | ")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
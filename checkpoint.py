@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Checkpoint and Resume of Long Optimizations
+
+ A driver recorder that saves, every few model evaluations, the design
+ variables, the converged coupled states (nodal displacements and loads) and
+ the driver counters to a small .npz file. The file is replaced atomically, so
+ a job killed while writing it still leaves the previous checkpoint.
+
+ A resumed run starts the optimizer from the checkpointed design with the
+ coupled states of that design, so its first MDA only takes a coupled
+ iteration or two. The earlier evaluations are not replayed: the scipy
+ optimizers cannot be handed back their internal state (e.g. the SLSQP
+ Hessian approximation), which is rebuilt in the first iterations.
+
+   python CRJ700_final.py --checkpoint crj700.npz
+   python CRJ700_final.py --checkpoint crj700.npz --resume
+
+ Under MPI (--parallel-points) the recorder runs on rank 0, so only the
+ states of the points of rank 0 are checkpointed; the other points restart
+ from their default states.
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import os
+import tempfile
+
+import numpy as np
+from openaerostruct.integration.aerostruct_groups import AerostructGeometry, AerostructPoint
+from openmdao.recorders.case_recorder import CaseRecorder
+
+
+def coupled_states(prob):
+    """
+    Returns the absolute names of the displacements and loads of the local flight points of a problem.
+    """
+    surfaces = [geometry.options["surface"]["name"]
+                for geometry in prob.model.system_iter(recurse=False, typ=AerostructGeometry)]
+
+    names = []
+    for point in prob.model.system_iter(typ=AerostructPoint):
+        for surface in surfaces:
+            names.append("{}.coupled.{}.disp".format(point.pathname, surface))
+            names.append("{}.coupled.{}_loads.loads".format(point.pathname, surface))
+    return names
+
+
+class CheckpointRecorder(CaseRecorder):
+    """
+    Driver recorder that periodically saves what is needed to resume an optimization.
+
+    Attributes
+    ----------
+    filename : str
+        The .npz checkpoint file.
+    every : int
+        Number of recorded model evaluations between checkpoints.
+    """
+
+    def __init__(self, prob, filename, every=1):
+        super().__init__(record_viewer_data=False)
+        self._prob = prob
+        self.filename = filename
+        self.every = every
+
+    def record_iteration_driver(self, driver, data, metadata):
+        if self._counter % self.every != 0:
+            return
+
+        # Keyed by the promoted names set_val takes, unlike the recorded data keyed by source.
+        # The design variables are outputs of the top level, so they are local to every rank.
+        values = {}
+        for name, value in driver.get_design_var_values(get_remote=False, driver_scaling=False).items():
+            values["desvar:" + name] = value
+        for name in coupled_states(self._prob):
+            values["state:" + name] = self._prob.get_val(name)
+
+        values["evaluation"] = self._counter
+        values["driver_iterations"] = driver.iter_count
+        values["model_evaluations"] = self._prob.model.iter_count
+
+        save_checkpoint(self.filename, values)
+
+    def record_metadata_system(self, system, run_number=None):
+        pass
+
+    def record_metadata_solver(self, solver, run_number=None):
+        pass
+
+    def record_iteration_system(self, system, data, metadata):
+        pass
+
+    def record_iteration_solver(self, solver, data, metadata):
+        pass
+
+    def record_iteration_problem(self, problem, data, metadata):
+        pass
+
+    def record_derivatives_driver(self, driver, data, metadata):
+        pass
+
+
+def save_checkpoint(filename, values):
+    """
+    Writes arrays to a .npz file, replacing the previous file atomically.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(f, **values)
+    os.replace(tmp, filename)
+
+
+def resume(prob, filename):
+    """
+    Initialises a problem from the last checkpoint of a previous run.
+
+    Parameters
+    ----------
+    prob : om.Problem
+        A problem returned by get_problem, not yet run, of the same
+        configuration as the checkpointed one.
+    filename : str
+        Checkpoint file written by a CheckpointRecorder.
+
+    Returns
+    -------
+    evaluation : int
+        Number of model evaluations the previous run had done at the checkpoint.
+    """
+    prob.final_setup()
+
+    local_states = set(coupled_states(prob))
+    with np.load(filename) as f:
+        for key in f.files:
+            kind, _, name = key.partition(":")
+            if kind == "desvar" or (kind == "state" and name in local_states):
+                prob.set_val(name, f[key])
+        evaluation = int(f["evaluation"])
+
+    return evaluation
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Design Space Sweep
+
+ Runs batches of CRJ700 MDAs over the wing span, sweep and taper and the
+ load factor of the maneuver point (or any subset of FACTORS), sampled with a full-factorial, Latin
+ hypercube or Sobol design, in a process pool. Every worker builds the
+ problem once (get_problem) and reuses it for all its points, so only the
+ MDAs are paid. The results are written to a single table, .csv or .npy:
+
+   python doe_sweep.py --design sobol --samples 1024 --workers 0 --output doe.npy
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import argparse
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import openmdao.api as om
+from scipy.stats import qmc
+
+from CRJ700_problem import CRUISE, DESIGN_VARS, INITIAL_VALUES, MANEUVER, build_surfaces, forget_problem, get_problem
+from result_cache import ResultCache, content_key
+
+# Sampled factors and their ranges, the planform ones within the optimization bounds
+_bounds = DESIGN_VARS["CRJ700"]
+FACTORS = {
+    "span": (_bounds["wing.geometry.span"]["lower"], _bounds["wing.geometry.span"]["upper"]),
+    "sweep": (_bounds["wing.sweep"]["lower"], _bounds["wing.sweep"]["upper"]),
+    "taper": (_bounds["wing.taper"]["lower"], _bounds["wing.taper"]["upper"]),
+    "t_over_c": (0.08, 0.16),  # of the wing
+    "load_factor": (1.5, 3.0),  # of the maneuver point
+}
+
+# Values of the factors that are not sampled
+BASELINE = {
+    "span": INITIAL_VALUES["CRJ700"]["span"],
+    "sweep": INITIAL_VALUES["CRJ700"]["sweep"],
+    "taper": INITIAL_VALUES["CRJ700"]["taper"],
+    "t_over_c": 0.12,
+    "load_factor": MANEUVER.load_factor,
+}
+
+DEFAULT_FACTORS = ("span", "sweep", "taper", "load_factor")
+
+# Responses of every MDA, by column name
+RESPONSES = {
+    "fuelburn": "AS_point_0.fuelburn",
+    "CD": "AS_point_0.wing_perf.CD",
+    "CL": "AS_point_0.wing_perf.CL",
+    "structural_mass": "wing.structural_mass",
+    "failure": "AS_point_1.wing_perf.failure",
+    "L_equals_W": "AS_point_0.L_equals_W",
+    "L_equals_W_maneuver": "AS_point_1.L_equals_W",
+    "fuel_vol_delta": "fuel_vol_delta.fuel_vol_delta",
+    "sweep_times_span": "sweep_times_span",
+}
+
+
+def full_factorial(levels, num_factors):
+    """
+    Returns the points of a full-factorial design on the unit hypercube.
+
+    Parameters
+    ----------
+    levels : int or list of int
+        Number of levels, for every factor or one per factor.
+    num_factors : int
+        Number of factors.
+
+    Returns
+    -------
+    samples : numpy array
+        Points of the design, shape (num_points, num_factors).
+    """
+    if isinstance(levels, int):
+        levels = [levels] * num_factors
+    grids = np.meshgrid(*[np.linspace(0.0, 1.0, n) for n in levels], indexing="ij")
+    return np.stack([grid.ravel() for grid in grids], axis=-1)
+
+
+def design(kind, samples, seed=None, factors=DEFAULT_FACTORS):
+    """
+    Returns the factor values of a design of experiments.
+
+    Parameters
+    ----------
+    kind : str
+        "full-factorial", "lhs" or "sobol".
+    samples : int
+        Number of levels per factor for a full-factorial design, or number of
+        points for LHS and Sobol (preferably a power of 2 for Sobol).
+    seed : int or None
+        Seed of the LHS and Sobol scrambling.
+    factors : tuple of str
+        Sampled factors, keys of FACTORS.
+
+    Returns
+    -------
+    points : numpy array
+        Factor values of every point, shape (num_points, len(factors)).
+    """
+    if kind == "full-factorial":
+        unit = full_factorial(samples, len(factors))
+    elif kind == "lhs":
+        unit = qmc.LatinHypercube(d=len(factors), seed=seed).random(samples)
+    elif kind == "sobol":
+        unit = qmc.Sobol(d=len(factors), seed=seed).random(samples)
+    else:
+        raise ValueError("Unknown design '{}', expected 'full-factorial', 'lhs' or 'sobol'".format(kind))
+
+    lower, upper = np.array([FACTORS[name] for name in factors], dtype=float).T
+    return qmc.scale(unit, lower, upper)
+
+
+def evaluate(point, factors=DEFAULT_FACTORS, num_x=5, num_y=21, cache=None):
+    """
+    Runs the MDA of one design point in the problem of the current process.
+
+    Parameters
+    ----------
+    point : numpy array
+        Values of the sampled factors, the others are at their BASELINE.
+    factors : tuple of str
+        Sampled factors, keys of FACTORS.
+    num_x : int
+        Number of chordwise mesh points.
+    num_y : int
+        Number of spanwise mesh points.
+    cache : str or None
+        Directory of a persistent result cache. Points found in it are not
+        run again.
+
+    Returns
+    -------
+    responses : list of float
+        Responses in the order of RESPONSES (their largest entry for arrays),
+        then the CPU time of the MDA [s]. NaN if the MDA failed.
+    """
+    values = dict(BASELINE)
+    values.update(zip(factors, np.asarray(point, dtype=float).tolist()))
+
+    if cache is not None:
+        cache = ResultCache(cache)
+        key = content_key(
+            surfaces=build_surfaces("CRJ700", num_x, num_y),
+            num_x=num_x,
+            num_y=num_y,
+            flight_points=[CRUISE, MANEUVER],
+            initial_values=INITIAL_VALUES["CRJ700"],
+            point=values,
+        )
+        results = cache.get(key)
+        if results is not None:
+            return results["responses"]
+
+    # Only input values change, so the memoized problem of this worker is reused.
+    # Every factor is set, since the problem keeps the values of the previous point.
+    options = dict(num_x=num_x, num_y=num_y, design_vars=(), constraints=())
+    prob = get_problem("CRJ700", initial_values={"span": values["span"], "sweep": values["sweep"],
+                                                 "taper": values["taper"]}, **options)
+    prob.set_val("wing.geometry.t_over_c_cp", np.array([values["t_over_c"]]))
+    prob.set_val("load_factor", np.array([CRUISE.load_factor, values["load_factor"]]))
+
+    start = time.process_time()
+    try:
+        prob.run_model()
+    except om.AnalysisError:
+        # The diverged states would seed the next points of this worker, so its problem is rebuilt
+        forget_problem("CRJ700", **options)
+        return [np.nan] * (len(RESPONSES) + 1)
+    end = time.process_time()
+
+    responses = [float(np.max(prob.get_val(name))) for name in RESPONSES.values()] + [end - start]
+    if not np.all(np.isfinite(responses)):
+        forget_problem("CRJ700", **options)
+        return [np.nan] * (len(RESPONSES) + 1)
+    if cache is not None:
+        cache.put(key, {"responses": responses})
+
+    return responses
+
+
+def run_design(points, factors=DEFAULT_FACTORS, workers=1, num_x=5, num_y=21, chunksize=8, cache=None):
+    """
+    Runs the MDA of every design point, either serially or in a process pool.
+
+    Parameters
+    ----------
+    points : numpy array
+        Values of the sampled factors of every point, shape (num_points, len(factors)).
+    factors : tuple of str
+        Sampled factors, keys of FACTORS.
+    workers : int or None
+        Number of worker processes. 1 runs every point in this process, None
+        uses one worker per CPU.
+    num_x : int
+        Number of chordwise mesh points.
+    num_y : int
+        Number of spanwise mesh points.
+    chunksize : int
+        Points sent to a worker at once, to amortize the inter-process traffic.
+    cache : str or None
+        Directory of a persistent result cache, shared by the workers.
+
+    Returns
+    -------
+    table : numpy array
+        Structured array with a field per sampled factor, per response and the CPU
+        time, one row per point.
+    """
+    run = functools.partial(evaluate, factors=tuple(factors), num_x=num_x, num_y=num_y, cache=cache)
+    if workers == 1:
+        rows = [run(point) for point in points]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(run, points, chunksize=chunksize))
+
+    names = list(factors) + list(RESPONSES) + ["cpu_time"]
+    table = np.empty(len(points), dtype=[(name, float) for name in names])
+    values = np.hstack([points, np.array(rows, dtype=float).reshape(len(points), -1)])
+    for i, name in enumerate(names):
+        table[name] = values[:, i]
+
+    return table
+
+
+def write_table(table, filename):
+    """
+    Writes a results table as .npy (structured array) or as .csv.
+    """
+    if filename.endswith(".npy"):
+        np.save(filename, table)
+    else:
+        np.savetxt(filename, np.column_stack([table[name] for name in table.dtype.names]),
+                   delimiter=",", header=",".join(table.dtype.names), comments="")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the CRJ700 design space over span, sweep, taper and load factor")
+    parser.add_argument("--design", choices=["full-factorial", "lhs", "sobol"], default="lhs")
+    parser.add_argument("--factors", nargs="+", choices=list(FACTORS), default=list(DEFAULT_FACTORS),
+                        help="sampled factors, the others are kept at their baseline")
+    parser.add_argument("--samples", type=int, default=64,
+                        help="points of LHS/Sobol designs, levels per factor of full-factorial ones")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (1 runs serially, 0 uses one per CPU)")
+    parser.add_argument("--num_x", type=int, default=5)
+    parser.add_argument("--num_y", type=int, default=21)
+    parser.add_argument("--output", default="doe.csv", help="results table, .csv or .npy")
+    parser.add_argument("--cache", default=None,
+                        help="directory of a persistent result cache, so a rerun only computes the missing points")
+    args = parser.parse_args()
+
+    points = design(args.design, args.samples, args.seed, args.factors)
+
+    start = time.time()
+    table = run_design(points, args.factors, workers=args.workers or None, num_x=args.num_x, num_y=args.num_y,
+                       cache=args.cache)
+    end = time.time()
+    print(len(points), "MDAs took", end - start, "[s],", np.sum(np.isnan(table["fuelburn"])), "failed")
+
+    write_table(table, args.output)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Optimization History Extraction
+
+ Reads selected variables of a recorded optimization history into NumPy
+ arrays, one case at a time, so only one case is held in memory however
+ long the history or broad the recording profile is.
+
+ The history can also be exported once to a columnar archive, a directory
+ with one .npy file per variable and an index.json (or a single HDF5 file
+ if h5py is installed), whose arrays are then memory-mapped instead of
+ decoding the sqlite rows again:
+
+   python history.py aerostruct.db aerostruct_history
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import openmdao.api as om
+from numpy.lib.format import open_memmap
+
+INDEX_FILE = "index.json"
+
+
+def _stream_history(cr, names, source, allocate):
+    """
+    Copies some variables of every case of a source into arrays given by allocate.
+
+    Parameters
+    ----------
+    cr : om.CaseReader
+        Reader of the recording.
+    names : list of str
+        Names of the variables, as recorded.
+    source : str
+        Case source.
+    allocate : callable
+        allocate(name, shape, dtype) returns the array of a variable, whose
+        first index is the iteration. It is called on the first case.
+
+    Returns
+    -------
+    history : dict
+        The allocated arrays, filled.
+    case_ids : list of str
+        Iteration coordinates of the cases.
+    """
+    case_ids = cr.list_cases(source, recurse=False, out_stream=None)
+
+    # get_case does not cache the cases in the reader, unlike get_cases
+    history = {name: np.empty(0) for name in names}
+    for i, case_id in enumerate(case_ids):
+        case = cr.get_case(case_id)
+        for name in names:
+            value = np.asarray(case[name])
+            if i == 0:
+                history[name] = allocate(name, (len(case_ids),) + value.shape, value.dtype)
+            history[name][i] = value
+
+    return history, case_ids
+
+
+def load_history(filename, names, source="driver"):
+    """
+    Extracts the history of some variables from a recording.
+
+    The arrays are allocated once, with the shape of each variable in the
+    first case, and filled as the cases are streamed.
+
+    Parameters
+    ----------
+    filename : str or om.CaseReader
+        Path of the sqlite recording, or an open reader.
+    names : list of str
+        Names of the variables (promoted or absolute), as recorded.
+    source : str
+        Case source, "driver" for the optimization history.
+
+    Returns
+    -------
+    history : dict
+        For each name, an array whose first index is the iteration.
+    """
+    cr = om.CaseReader(filename) if isinstance(filename, str) else filename
+    history, case_ids = _stream_history(cr, names, source, lambda name, shape, dtype: np.empty(shape, dtype))
+
+    return history
+
+
+def export_history(filename, path, names=None, source="driver", hdf5=False):
+    """
+    Exports the history of a recording to a columnar archive.
+
+    Every variable is written straight to its file as the cases are
+    streamed, so the history is never held in memory.
+
+    Parameters
+    ----------
+    filename : str or om.CaseReader
+        Path of the sqlite recording, or an open reader.
+    path : str
+        Directory of the .npy archive, or file of the HDF5 archive.
+    names : list of str or None
+        Names of the variables. If None, every output recorded by the source.
+    source : str
+        Case source, "driver" for the optimization history.
+    hdf5 : bool
+        If True, write a single HDF5 file (requires h5py) instead of a
+        directory of .npy files.
+    """
+    cr = om.CaseReader(filename) if isinstance(filename, str) else filename
+    if names is None:
+        names = cr.list_source_vars(source, out_stream=None)["outputs"]
+
+    if hdf5:
+        import h5py
+
+        with h5py.File(path, "w") as f:
+            _, case_ids = _stream_history(
+                cr, names, source, lambda name, shape, dtype: f.create_dataset(name, shape, dtype)
+            )
+            f.attrs["source"] = source
+            f.create_dataset("iteration_coordinates", data=np.array(case_ids, dtype=h5py.string_dtype()))
+        return
+
+    os.makedirs(path, exist_ok=True)
+    files = {name: name.replace(":", "_") + ".npy" for name in names}
+    history, case_ids = _stream_history(
+        cr, names, source,
+        lambda name, shape, dtype: open_memmap(os.path.join(path, files[name]), mode="w+", dtype=dtype, shape=shape),
+    )
+
+    index = {"source": source, "iteration_coordinates": case_ids, "variables": {}}
+    for name, array in history.items():
+        if isinstance(array, np.memmap):
+            array.flush()
+            index["variables"][name] = {"file": files[name], "shape": list(array.shape), "dtype": str(array.dtype)}
+
+    with open(os.path.join(path, INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=2)
+
+
+def read_history(path, names=None):
+    """
+    Opens a columnar archive written by export_history without loading it.
+
+    The .npy arrays are memory-mapped read-only, so slicing them only reads
+    the slices from disk. An HDF5 archive returns h5py datasets, which are
+    sliced the same way and read lazily.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the .npy archive, or file of the HDF5 archive.
+    names : list of str or None
+        Names of the variables. If None, every exported variable.
+
+    Returns
+    -------
+    history : dict
+        For each name, an array-like whose first index is the iteration.
+    """
+    if os.path.isfile(path):
+        import h5py
+
+        f = h5py.File(path, "r")
+        if names is None:
+            names = [name for name in f if name != "iteration_coordinates"]
+        return {name: f[name] for name in names}
+
+    with open(os.path.join(path, INDEX_FILE)) as f:
+        index = json.load(f)
+
+    if names is None:
+        names = list(index["variables"])
+    return {name: np.load(os.path.join(path, index["variables"][name]["file"]), mmap_mode="r") for name in names}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export an optimization history to a columnar archive")
+    parser.add_argument("recording", help="sqlite recording, e.g. aerostruct.db")
+    parser.add_argument("path", help="directory of the .npy archive, or file of the HDF5 archive")
+    parser.add_argument("--names", nargs="+", default=None, help="variables to export (default: every output)")
+    parser.add_argument("--source", default="driver")
+    parser.add_argument("--hdf5", action="store_true", help="write a single HDF5 file (requires h5py)")
+    args = parser.parse_args()
+
+    export_history(args.recording, args.path, args.names, args.source, args.hdf5)
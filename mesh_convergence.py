@@ -13,97 +13,421 @@ Final Project - Mesh Convergence Study
  ========================================================================
 """
 
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy             as np
 import matplotlib.pyplot as plt
-from MDA_mesh import MDA_mesh
-import time
+from MDA_mesh import MDA_mesh_results
 
 # Define test arrays for chordwise and spanwise mesh points
 num_x_array = [2, 5, 11, 21]
 num_y_array = [5, 11, 21, 41, 61]
 
 
-## Mesh Convergence Analysis for changes in # of chordwise points
-
-# Initialize arrays to store results for num_x variations
-CDx = np.zeros(len(num_x_array))              # CD array
-CDx_deltas = np.zeros(len(num_x_array)-1) 
-WBMx = np.zeros(len(num_x_array))             # Wingbox Mass array
-WBMx_deltas = np.zeros(len(num_x_array)-1)
-Tx = np.zeros(len(num_x_array))               # CPU times array
-Tx_deltas = np.zeros(len(num_x_array)-1)
-
-# Iterates different num_x and stores values in array
-for i in range(len(num_x_array)):
-    start = time.time()
-    CDx[i], WBMx[i] = MDA_mesh(num_x_array[i], 7)
-    end = time.time()
-    Tx[i] = end-start
-    
-# Iterates through obtained values, determines deltas (in %), and stores in array
-for i in range(len(num_x_array) - 1):
-    CDx_deltas[i] = ((CDx[i + 1] - CDx[i]) / CDx[i]) * 100
-    WBMx_deltas[i] = ((WBMx[i + 1] - WBMx[i]) / WBMx[i]) * 100
-    Tx_deltas[i] = ((Tx[i + 1] - Tx[i]) / Tx[i]) * 100
-    
-    
-    
-
-## Mesh Convergence Analysis for changes in # of spanwise points
-
-# Initialize arrays to store results for num_y variations
-CDy = np.zeros(len(num_y_array))              # CD array
-CDy_deltas = np.zeros(len(num_y_array)-1) 
-WBMy = np.zeros(len(num_y_array))             # Wingbox Mass array
-WBMy_deltas = np.zeros(len(num_y_array)-1)
-Ty = np.zeros(len(num_y_array))               # CPU times array
-Ty_deltas = np.zeros(len(num_y_array)-1)
-
-# Iterates different num_y and stores values in array
-for i in range(len(num_y_array)):
-    start = time.time()
-    CDy[i], WBMy[i] = MDA_mesh(5, num_y_array[i])
-    end = time.time()
-    Ty[i] = end-start
-    
-# Iterates through obtained values, determines deltas (in %), and stores in array
-for i in range(len(num_y_array) - 1):
-    CDy_deltas[i] = ((CDy[i + 1] - CDy[i]) / CDy[i]) * 100
-    WBMy_deltas[i] = ((WBMy[i + 1] - WBMy[i]) / WBMy[i]) * 100
-    Ty_deltas[i] = ((Ty[i + 1] - Ty[i]) / Ty[i]) * 100
-    
-    
-    
-
-## Prints values that are copyable into LaTeX
-
-# Guarantees all arrays (cols) are the same length
-CDx_deltas = np.insert(CDx_deltas, 0, 999)    # inserts at index 0 a dummy value
-WBMx_deltas = np.insert(WBMx_deltas, 0, 999)
-Tx_deltas = np.insert(Tx_deltas, 0, 999) 
-
-CDy_deltas = np.insert(CDy_deltas, 0, 999)    # inserts at index 0 a dummy value
-WBMy_deltas = np.insert(WBMy_deltas, 0, 999)
-Ty_deltas = np.insert(Ty_deltas, 0, 999) 
-
-
-print("num_x", "CDx", "&", "CDx_deltas", "&", "WBMx", "&", "WBMx_deltas", "&",
-      "Tx", "&", "Tx_deltas", "\ \\")
-for i in range(len(num_x_array)):
-    print(num_x_array[i], "&", CDx[i], "&", CDx_deltas[i], "&", WBMx[i], "&", WBMx_deltas[i], "&",
-          Tx[i], "&", Tx_deltas[i], "\\") 
-    
-print("num_y", "CDy", "&", "CDy_deltas", "&", "WBMy", "&", "WBMy_deltas", "&",
-      "Ty", "&", "Ty_deltas", "\ \\")
-for i in range(len(num_y_array)):
-    print(num_y_array[i], "&", CDy[i], "&", CDy_deltas[i], "&", WBMy[i], "&", WBMy_deltas[i], "&",
-          Ty[i], "&", Ty_deltas[i], "\\")
-    
-    
-    
-# # fig, ax = plt.subplots()
-# # ax.plot(num_y_values, CPU_times, marker='o')
-# # ax.set_xlabel('num_y')
-# # ax.set_ylabel('CPU time')
-# # ax.set_title('Variation of CPU time with num_y')
-# # plt.show()
\ No newline at end of file
+def run_case(mesh, recorder=None, cache=None, coarse=None):
+    """
+    Performs the MDA of one mesh and measures its CPU time
+
+    The CPU time is measured in the process that runs the case, so it is
+    also meaningful when the case runs in a worker of a process pool.
+
+    Parameters
+    ----------
+    mesh : tuple
+        Number of chordwise and spanwise mesh points, (num_x, num_y).
+    recorder : str or None
+        Recorder file name pattern passed to MDA_mesh.
+    cache : str or None
+        Directory of the persistent result cache. Cases found in it are not
+        run again, and report the CPU time of their original run.
+    coarse : tuple or None
+        Coarser mesh analysed before in this process, whose coupled states
+        are the initial guess of this one.
+
+    Returns
+    -------
+    CD : float
+        Computed value of CD using the defined mesh.
+    WBM : float
+        Computed value of the Wingbox mass using the defined mesh.
+    T : float
+        CPU time of the MDA, in seconds.
+    """
+    num_x, num_y = mesh
+
+    results = MDA_mesh_results(num_x, num_y, recorder=recorder, cache=cache, coarse=coarse)
+
+    return results["CD"], results["wingbox_mass"], results["cpu_time"]
+
+
+def refinement_chains(meshes):
+    """
+    Splits a list of meshes into runs where every mesh refines the previous one
+
+    Parameters
+    ----------
+    meshes : list of tuple
+        Meshes, as (num_x, num_y) pairs.
+
+    Returns
+    -------
+    chains : list of list of int
+        Indices of the meshes of each chain, in the order of meshes.
+    """
+    chains = []
+    for k, mesh in enumerate(meshes):
+        if chains and all(n >= m for n, m in zip(mesh, meshes[chains[-1][-1]])):
+            chains[-1].append(k)
+        else:
+            chains.append([k])
+    return chains
+
+
+def run_chain(meshes, recorder=None, cache=None):
+    """
+    Performs the MDA of a chain of refined meshes, each one starting from the states of the previous one
+
+    Parameters
+    ----------
+    meshes : list of tuple
+        Meshes, as (num_x, num_y) pairs, each one refining the previous one.
+    recorder : str or None
+        Recorder file name pattern passed to MDA_mesh.
+    cache : str or None
+        Directory of the persistent result cache.
+
+    Returns
+    -------
+    results : list of tuple
+        (CD, WBM, T) of each mesh.
+    """
+    results = []
+    coarse = None
+    for mesh in meshes:
+        results.append(run_case(mesh, recorder, cache, coarse))
+        coarse = mesh
+    return results
+
+
+def run_cases(meshes, workers=1, recorder=None, cache=None, warm_start=False):
+    """
+    Performs the MDA of several meshes, either serially or in a process pool
+
+    Parameters
+    ----------
+    meshes : list of tuple
+        Meshes to analyse, as (num_x, num_y) pairs.
+    workers : int or None
+        Number of worker processes. 1 runs every case in this process, None
+        uses one worker per CPU.
+    recorder : str or None
+        Recorder file name pattern passed to MDA_mesh. It must contain
+        {num_x} and {num_y} when running in parallel.
+    cache : str or None
+        Directory of the persistent result cache, shared by the workers.
+    warm_start : bool
+        If True, every mesh that refines the previous one in the list starts
+        from its interpolated coupled states. Such chains of meshes run in the
+        same process, one after the other, so with workers the study takes as
+        long as its longest chain instead of its slowest case. The warm start
+        only saves a few coupled iterations per case (22 instead of 25 for
+        the 5x41 mesh), so it only pays off when running serially.
+
+    Returns
+    -------
+    results : list of tuple
+        (CD, WBM, T) of each mesh, in the order of meshes.
+    """
+    if warm_start:
+        chains = refinement_chains(meshes)
+    else:
+        chains = [[k] for k in range(len(meshes))]
+
+    if workers == 1:
+        results = [None] * len(meshes)
+        for chain in chains:
+            for k, result in zip(chain, run_chain([meshes[k] for k in chain], recorder, cache)):
+                results[k] = result
+        return results
+
+    if recorder is not None and ("{num_x}" not in recorder or "{num_y}" not in recorder):
+        raise ValueError("Parallel cases need a per-case recorder file, e.g. 'mda_{num_x}x{num_y}.db'")
+
+    # The cost grows with the mesh size, so the most expensive chains are
+    # submitted first to keep the slowest one from starting last
+    chains.sort(key=lambda chain: sum(meshes[k][0] * meshes[k][1] for k in chain), reverse=True)
+
+    results = [None] * len(meshes)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [(chain, executor.submit(run_chain, [meshes[k] for k in chain], recorder, cache)) for chain in chains]
+        for chain, future in futures:
+            for k, result in zip(chain, future.result()):
+                results[k] = result
+
+    return results
+
+
+def refined(n):
+    """
+    Returns the number of mesh points with twice as many panels as n points.
+
+    Doubling the panels keeps num_y odd and the refinement ratio constant,
+    as Richardson extrapolation requires.
+    """
+    return 2 * n - 1
+
+
+def richardson(values, ratio=2.0):
+    """
+    Estimates the asymptotic value of a result from its last three meshes
+
+    Parameters
+    ----------
+    values : list of float
+        Result on meshes refined by a constant ratio, coarsest first.
+    ratio : float
+        Refinement ratio of the panels between successive meshes.
+
+    Returns
+    -------
+    extrapolated : float
+        Richardson extrapolation of the result. The finest value if the last
+        three do not converge monotonically (or fewer than three are given).
+    order : float
+        Observed order of convergence, NaN if it could not be estimated.
+    """
+    if len(values) < 3:
+        return values[-1], np.nan
+
+    coarse, medium, fine = values[-3:]
+    if fine == medium:
+        return fine, np.inf
+
+    # Ratio of successive changes, ratio**order for a monotonically converging result
+    q = (coarse - medium) / (medium - fine)
+    if q <= 1.0:
+        return fine, np.nan
+
+    return fine - (medium - fine) / (q - 1.0), np.log(q) / np.log(ratio)
+
+
+def refine(axis, mesh, tol, max_points, recorder=None, cache=None):
+    """
+    Refines the mesh in one direction until CD and the wingbox mass converge
+
+    Parameters
+    ----------
+    axis : int
+        Direction refined, 0 for num_x and 1 for num_y.
+    mesh : tuple
+        Initial mesh, (num_x, num_y).
+    tol : float
+        Relative change of CD and wingbox mass, between a mesh and its
+        refinement, below which the mesh is converged.
+    max_points : int
+        Largest number of points in the refined direction.
+    recorder : str or None
+        Recorder file name pattern passed to MDA_mesh.
+    cache : str or None
+        Directory of the persistent result cache.
+
+    Returns
+    -------
+    converged : tuple or None
+        Cheapest converged mesh, None if max_points was reached first.
+    history : list of tuple
+        (mesh, CD, WBM, T) of every mesh analysed, coarsest first.
+    """
+    history = []
+    while True:
+        # Each refinement starts from the coupled states of the previous mesh
+        CD, WBM, T = run_case(mesh, recorder, cache, history[-1][0] if history else None)
+        history.append((mesh, CD, WBM, T))
+
+        if len(history) >= 2:
+            coarse_mesh, coarse_CD, coarse_WBM, _ = history[-2]
+            if abs(CD - coarse_CD) <= tol * abs(CD) and abs(WBM - coarse_WBM) <= tol * abs(WBM):
+                return coarse_mesh, history
+
+        if refined(mesh[axis]) > max_points:
+            return None, history
+        mesh = (refined(mesh[0]), mesh[1]) if axis == 0 else (mesh[0], refined(mesh[1]))
+
+
+def adaptive_study(tol=1e-2, num_x=2, num_y=5, max_num_x=17, max_num_y=65, recorder=None, cache=None):
+    """
+    Finds the cheapest mesh whose CD and wingbox mass are converged within a tolerance
+
+    The spanwise points are refined first, then the chordwise ones on the
+    converged (or finest) spanwise mesh. The asymptotic values of each
+    direction are estimated by Richardson extrapolation.
+
+    Parameters
+    ----------
+    tol : float
+        Relative change of CD and wingbox mass below which a mesh is converged.
+    num_x : int
+        Initial number of chordwise mesh points.
+    num_y : int
+        Initial number of spanwise mesh points (odd).
+    max_num_x : int
+        Largest number of chordwise mesh points.
+    max_num_y : int
+        Largest number of spanwise mesh points.
+    recorder : str or None
+        Recorder file name pattern passed to MDA_mesh.
+    cache : str or None
+        Directory of the persistent result cache.
+
+    Returns
+    -------
+    study : dict
+        "mesh": cheapest converged mesh (the finest one analysed if a limit was
+        reached first) and "converged": whether both directions converged.
+        For each direction ("num_y", "num_x"): "history" as returned by refine,
+        and the Richardson "CD" and "WBM" as (extrapolated, order).
+    """
+    study = {"converged": True}
+    mesh = (num_x, num_y)
+    for axis, name, max_points in ((1, "num_y", max_num_y), (0, "num_x", max_num_x)):
+        converged, history = refine(axis, mesh, tol, max_points, recorder, cache)
+        if converged is None:
+            study["converged"] = False
+            converged = history[-1][0]
+        mesh = converged
+
+        study[name] = {
+            "history": history,
+            "CD": richardson([CD for m, CD, WBM, T in history]),
+            "WBM": richardson([WBM for m, CD, WBM, T in history]),
+        }
+
+    study["mesh"] = mesh
+    return study
+
+
+parser = argparse.ArgumentParser(description="Mesh convergence study of the CD and wingbox mass")
+parser.add_argument("--workers", type=int, default=1,
+                    help="number of worker processes (1 runs serially, 0 uses one per CPU). Every case runs on its "
+                         "own, so the study takes about as long as its slowest case, unless --warm-start chains them")
+parser.add_argument("--recorder", default=None,
+                    help="record every MDA to this file, formatted with {num_x} and {num_y}")
+parser.add_argument("--adaptive", action="store_true",
+                    help="refine the mesh only until CD and the wingbox mass converge, instead of the fixed lists")
+parser.add_argument("--tol", type=float, default=1e-2,
+                    help="relative change of CD and wingbox mass below which the adaptive study stops")
+parser.add_argument("--warm-start", action="store_true",
+                    help="start every case from the states of the previous, coarser mesh, which saves a few coupled "
+                         "iterations per case but runs each refinement chain serially in a single worker")
+parser.add_argument("--cache", default=None,
+                    help="directory of a persistent result cache, so a rerun only computes the missing cases")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    if args.adaptive:
+        study = adaptive_study(args.tol, recorder=args.recorder, cache=args.cache)
+
+        for name in ("num_y", "num_x"):
+            print("Refinement of", name)
+            print("num_x", "num_y", "CD", "WBM", "T", sep=" | ")
+            for (num_x, num_y), CD, WBM, T in study[name]["history"]:
+                print(num_x, num_y, CD, WBM, T, sep=" | ")
+            print("Richardson extrapolation: CD =", study[name]["CD"][0], "(order", study[name]["CD"][1], "),",
+                  "WBM =", study[name]["WBM"][0], "(order", study[name]["WBM"][1], ")")
+
+        if not study["converged"]:
+            print("The mesh did not converge within", args.tol, "before the largest mesh")
+        print("Cheapest mesh converged within", args.tol, ": num_x =", study["mesh"][0], ", num_y =", study["mesh"][1])
+
+    else:
+        # Every case is independent, so the chordwise and spanwise variations are run together
+        meshes = [(num_x, 7) for num_x in num_x_array] + [(5, num_y) for num_y in num_y_array]
+
+        start = time.time()
+        results = run_cases(meshes, workers=args.workers or None, recorder=args.recorder, cache=args.cache,
+                            warm_start=args.warm_start)
+        end = time.time()
+        print("Mesh convergence study took", end - start, "[s]")
+
+        ## Mesh Convergence Analysis for changes in # of chordwise points
+
+        # Initialize arrays to store results for num_x variations
+        CDx = np.zeros(len(num_x_array))              # CD array
+        CDx_deltas = np.zeros(len(num_x_array)-1) 
+        WBMx = np.zeros(len(num_x_array))             # Wingbox Mass array
+        WBMx_deltas = np.zeros(len(num_x_array)-1)
+        Tx = np.zeros(len(num_x_array))               # CPU times array
+        Tx_deltas = np.zeros(len(num_x_array)-1)
+
+        # Stores values of the num_x cases in arrays
+        for i in range(len(num_x_array)):
+            CDx[i], WBMx[i], Tx[i] = results[i]
+
+        # Iterates through obtained values, determines deltas (in %), and stores in array
+        for i in range(len(num_x_array) - 1):
+            CDx_deltas[i] = ((CDx[i + 1] - CDx[i]) / CDx[i]) * 100
+            WBMx_deltas[i] = ((WBMx[i + 1] - WBMx[i]) / WBMx[i]) * 100
+            Tx_deltas[i] = ((Tx[i + 1] - Tx[i]) / Tx[i]) * 100
+
+
+
+
+        ## Mesh Convergence Analysis for changes in # of spanwise points
+
+        # Initialize arrays to store results for num_y variations
+        CDy = np.zeros(len(num_y_array))              # CD array
+        CDy_deltas = np.zeros(len(num_y_array)-1) 
+        WBMy = np.zeros(len(num_y_array))             # Wingbox Mass array
+        WBMy_deltas = np.zeros(len(num_y_array)-1)
+        Ty = np.zeros(len(num_y_array))               # CPU times array
+        Ty_deltas = np.zeros(len(num_y_array)-1)
+
+        # Stores values of the num_y cases in arrays
+        for i in range(len(num_y_array)):
+            CDy[i], WBMy[i], Ty[i] = results[len(num_x_array) + i]
+
+        # Iterates through obtained values, determines deltas (in %), and stores in array
+        for i in range(len(num_y_array) - 1):
+            CDy_deltas[i] = ((CDy[i + 1] - CDy[i]) / CDy[i]) * 100
+            WBMy_deltas[i] = ((WBMy[i + 1] - WBMy[i]) / WBMy[i]) * 100
+            Ty_deltas[i] = ((Ty[i + 1] - Ty[i]) / Ty[i]) * 100
+
+
+
+
+        ## Prints values that are copyable into LaTeX
+
+        # Guarantees all arrays (cols) are the same length
+        CDx_deltas = np.insert(CDx_deltas, 0, 999)    # inserts at index 0 a dummy value
+        WBMx_deltas = np.insert(WBMx_deltas, 0, 999)
+        Tx_deltas = np.insert(Tx_deltas, 0, 999) 
+
+        CDy_deltas = np.insert(CDy_deltas, 0, 999)    # inserts at index 0 a dummy value
+        WBMy_deltas = np.insert(WBMy_deltas, 0, 999)
+        Ty_deltas = np.insert(Ty_deltas, 0, 999) 
+
+
+        print("num_x", "CDx", "&", "CDx_deltas", "&", "WBMx", "&", "WBMx_deltas", "&",
+              "Tx", "&", "Tx_deltas", "\ \\")
+        for i in range(len(num_x_array)):
+            print(num_x_array[i], "&", CDx[i], "&", CDx_deltas[i], "&", WBMx[i], "&", WBMx_deltas[i], "&",
+                  Tx[i], "&", Tx_deltas[i], "\\") 
+
+        print("num_y", "CDy", "&", "CDy_deltas", "&", "WBMy", "&", "WBMy_deltas", "&",
+              "Ty", "&", "Ty_deltas", "\ \\")
+        for i in range(len(num_y_array)):
+            print(num_y_array[i], "&", CDy[i], "&", CDy_deltas[i], "&", WBMy[i], "&", WBMy_deltas[i], "&",
+                  Ty[i], "&", Ty_deltas[i], "\\")
+
+
+
+        # # fig, ax = plt.subplots()
+        # # ax.plot(num_y_values, CPU_times, marker='o')
+        # # ax.set_xlabel('num_y')
+        # # ax.set_ylabel('CPU time')
+        # # ax.set_title('Variation of CPU time with num_y')
+        # # plt.show()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Mesh Sequencing of the CRJ700 Optimization
+
+ Runs the full CRJ700 optimization (CRJ700_final.py) on a sequence of
+ meshes: SLSQP first converges to a loose tolerance on a coarse mesh, then
+ the design variables and the coupled states are interpolated onto the next
+ finer mesh and the optimization continues with a tighter tolerance. Most
+ iterations are then paid on the cheap meshes, and the fine mesh only polishes
+ an almost converged design.
+
+   python mesh_sequencing.py --levels 3 11 5 21 --tols 1e-4 1e-9
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import argparse
+import time
+
+from CRJ700_problem import FINAL_CONSTRAINTS, FINAL_DESIGN_VARS, get_problem, print_results
+from prolongation import prolong_states, transfer_design_vars
+
+
+def mesh_sequence(levels, tols, design_vars=FINAL_DESIGN_VARS, constraints=FINAL_CONSTRAINTS, initial_values=None,
+                  **options):
+    """
+    Optimizes the CRJ700 model on a sequence of increasingly finer meshes.
+
+    Parameters
+    ----------
+    levels : list of tuple
+        Meshes, as (num_x, num_y), coarsest first.
+    tols : list of float
+        SLSQP tolerance of each mesh, loosest first.
+    design_vars : tuple of str
+        Names of the design variables.
+    constraints : tuple of str
+        Names of the constraints.
+    initial_values : dict or None
+        Initial values of the first mesh, see get_problem.
+    **options
+        Any other argument of build_problem, e.g. span_cos_spacing. A
+        recorder only records the finest mesh.
+
+    Returns
+    -------
+    prob : om.Problem
+        The problem of the finest mesh, optimized.
+    stats : list of dict
+        Mesh, driver iterations, model evaluations and wall time of each level.
+    """
+    if len(levels) != len(tols):
+        raise ValueError("Expected one tolerance per mesh, got {} and {}".format(len(tols), len(levels)))
+
+    recorder = options.pop("recorder", None)
+
+    prob = None
+    stats = []
+    for k, ((num_x, num_y), tol) in enumerate(zip(levels, tols)):
+        coarse = prob
+        prob = get_problem("CRJ700", num_x=num_x, num_y=num_y, design_vars=design_vars, constraints=constraints,
+                           recorder=recorder if k == len(levels) - 1 else None, initial_values=initial_values,
+                           **options)
+
+        if coarse is not None:
+            transfer_design_vars(coarse, prob, design_vars)
+            prolong_states(coarse, prob)
+
+        # The problem is memoized by get_problem, so its tolerance is restored for later users
+        default_tol = prob.driver.options["tol"]
+        prob.driver.options["tol"] = tol
+        model_count = prob.model.iter_count
+
+        try:
+            start = time.time()
+            prob.run_driver()
+            end = time.time()
+        finally:
+            prob.driver.options["tol"] = default_tol
+
+        stats.append({
+            "mesh": (num_x, num_y),
+            "tol": tol,
+            "driver_iterations": prob.driver.iter_count,
+            "model_evaluations": prob.model.iter_count - model_count,
+            "wall_time": end - start,
+        })
+
+    return prob, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CRJ700 optimization with mesh sequencing")
+    parser.add_argument("--levels", type=int, nargs="+", default=[3, 11, 5, 21],
+                        help="meshes, coarsest first, as num_x num_y pairs")
+    parser.add_argument("--tols", type=float, nargs="+", default=[1e-4, 1e-9],
+                        help="SLSQP tolerance of each mesh, loosest first")
+    args = parser.parse_args()
+
+    levels = list(zip(args.levels[::2], args.levels[1::2]))
+
+    prob, stats = mesh_sequence(levels, args.tols, span_cos_spacing=1, recorder="aerostruct.db")
+
+    print("num_x", "num_y", "tol", "driver iterations", "model evaluations", "wall time [s]", sep=" | ")
+    for level in stats:
+        print(*level["mesh"], level["tol"], level["driver_iterations"], level["model_evaluations"], level["wall_time"],
+              sep=" | ")
+
+    print_results(prob)
+
+    prob.cleanup()
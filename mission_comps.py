@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Weight Build-Up and Fuel Consistency Components
+
+ Explicit components with closed-form partials that replace the ExecComps
+ W0 = W0_without_point_masses + 2 * sum(point_masses) and
+ fuel_diff = (fuel_mass - fuelburn) / fuelburn, which were complex stepped
+ at every linearization.
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import numpy as np
+import openmdao.api as om
+
+
+class WeightBuildUp(om.ExplicitComponent):
+    """
+    Add the point masses, mirrored on both sides of the aircraft, to the rest of the initial weight.
+
+    Options
+    -------
+    num_nodes : int
+        Number of flight points.
+    n_point_masses : int
+        Number of point masses on one side of the aircraft.
+    mirror_factor : float
+        Number of times each point mass counts (2 for a symmetric half model).
+
+    Parameters
+    ----------
+    W0_without_point_masses : numpy array
+        Initial weight without the point masses at each flight point [kg].
+    point_masses : numpy array
+        Point masses on one side of the aircraft [kg].
+
+    Returns
+    -------
+    W0 : numpy array
+        Initial weight at each flight point [kg].
+
+    """
+
+    def initialize(self):
+        self.options.declare("num_nodes", default=1, types=int)
+        self.options.declare("n_point_masses", default=1, types=int)
+        self.options.declare("mirror_factor", default=2.0, types=float)
+
+    def setup(self):
+        nn = self.options["num_nodes"]
+        n_point_masses = self.options["n_point_masses"]
+        factor = self.options["mirror_factor"]
+
+        self.add_input("W0_without_point_masses", val=np.zeros(nn), units="kg")
+        self.add_input("point_masses", val=np.zeros(n_point_masses), units="kg")
+        self.add_output("W0", val=np.zeros(nn), units="kg")
+
+        # W0 is linear in its inputs, so the partials are constant
+        arange = np.arange(nn)
+        self.declare_partials("W0", "W0_without_point_masses", rows=arange, cols=arange, val=1.0)
+        self.declare_partials("W0", "point_masses", val=factor * np.ones((nn, n_point_masses)))
+
+    def compute(self, inputs, outputs):
+        factor = self.options["mirror_factor"]
+
+        outputs["W0"] = inputs["W0_without_point_masses"] + factor * np.sum(inputs["point_masses"])
+
+
+class FuelDiff(om.ExplicitComponent):
+    """
+    Calculate the relative difference between the carried fuel and the fuel burn.
+
+    Options
+    -------
+    num_nodes : int
+        Number of flight points.
+
+    Parameters
+    ----------
+    fuel_mass : numpy array
+        Fuel mass carried at each flight point [kg].
+    fuelburn : numpy array
+        Fuel burn at each flight point [kg].
+
+    Returns
+    -------
+    fuel_diff : numpy array
+        (fuel_mass - fuelburn) / fuelburn at each flight point.
+
+    """
+
+    def initialize(self):
+        self.options.declare("num_nodes", default=1, types=int)
+
+    def setup(self):
+        nn = self.options["num_nodes"]
+
+        self.add_input("fuel_mass", val=np.ones(nn), units="kg")
+        self.add_input("fuelburn", val=np.ones(nn), units="kg")
+        self.add_output("fuel_diff", val=np.zeros(nn))
+
+        # Each flight point only depends on its own fuel, so the jacobians are diagonal
+        arange = np.arange(nn)
+        self.declare_partials("fuel_diff", "fuel_mass", rows=arange, cols=arange)
+        self.declare_partials("fuel_diff", "fuelburn", rows=arange, cols=arange)
+
+    def compute(self, inputs, outputs):
+        fuel_mass = inputs["fuel_mass"]
+        fuelburn = inputs["fuelburn"]
+
+        outputs["fuel_diff"] = (fuel_mass - fuelburn) / fuelburn
+
+    def compute_partials(self, inputs, partials):
+        fuel_mass = inputs["fuel_mass"]
+        fuelburn = inputs["fuelburn"]
+
+        partials["fuel_diff", "fuel_mass"] = 1.0 / fuelburn
+        partials["fuel_diff", "fuelburn"] = -fuel_mass / fuelburn**2
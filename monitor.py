@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Live Optimization Monitor
+
+ Follows aerostruct.db while an optimization script runs and shows the
+ objective, the largest constraint violation and the design variables of
+ every new driver iteration, as a text dashboard or as live plots:
+
+   python CRJ700_final.py &
+   python monitor.py aerostruct.db [--plot]
+
+ The recording is polled through a read-only connection that only asks for
+ the ids of the rows added since the last poll, and only those cases are
+ decoded. Each query holds the shared lock for a moment, so the recorder
+ (and the driver) is never blocked for longer than one small read.
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import openmdao.api as om
+
+from CRJ700_problem import constraint_violation
+
+
+def new_driver_rows(filename, last_id=0):
+    """
+    Returns the driver iterations recorded after a given row.
+
+    Parameters
+    ----------
+    filename : str
+        SqliteRecorder file, possibly still being written.
+    last_id : int
+        Row id of the last iteration already seen.
+
+    Returns
+    -------
+    rows : list of tuple
+        (row id, iteration coordinate) of the new iterations. Empty if the
+        file or its tables do not exist yet.
+    """
+    if not os.path.exists(filename):
+        return []
+
+    con = sqlite3.connect("file:{}?mode=ro".format(os.path.abspath(filename)), uri=True, timeout=1.0)
+    try:
+        return con.execute(
+            "SELECT id, iteration_coordinate FROM driver_iterations WHERE id > ? ORDER BY id", (last_id,)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # The recorder has not created its tables yet, or is writing them
+        return []
+    finally:
+        con.close()
+
+
+class DriverMonitor:
+    """
+    History of the objective, constraint violation and design variables of a running optimization.
+
+    Attributes
+    ----------
+    filename : str
+        SqliteRecorder file followed.
+    last_id : int
+        Row id of the last driver iteration read.
+    iterations : list of str
+        Iteration coordinates read so far.
+    objective : list of float
+        Objective of each iteration.
+    violation : list of float
+        Largest constraint violation of each iteration.
+    desvars : dict
+        Flattened values of each design variable, one list per variable.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.last_id = 0
+        self.iterations = []
+        self.objective = []
+        self.violation = []
+        self.desvars = {}
+
+    def update(self):
+        """
+        Reads the driver iterations recorded since the last update.
+
+        Returns
+        -------
+        count : int
+            Number of new iterations.
+        """
+        rows = new_driver_rows(self.filename, self.last_id)
+        if len(rows) == 0:
+            return 0
+
+        # A new reader sees the new rows; only these cases are decoded
+        cr = om.CaseReader(self.filename)
+        metadata = cr.problem_metadata["variables"]
+        for row_id, coordinate in rows:
+            case = cr.get_case(coordinate)
+            self.iterations.append(coordinate)
+            self.objective.append(float(np.sum(list(case.get_objectives().values()))))
+            self.violation.append(float(constraint_violation(case, metadata)))
+            for name, val in case.get_design_vars().items():
+                self.desvars.setdefault(name, []).append(np.ravel(val))
+            self.last_id = row_id
+
+        return len(rows)
+
+    def print_new(self, count):
+        """
+        Prints one dashboard line for each of the last count iterations.
+        """
+        for i in range(len(self.iterations) - count, len(self.iterations)):
+            desvars = ", ".join(
+                "{} = {}".format(name, np.array2string(values[i], precision=4, max_line_width=200))
+                for name, values in self.desvars.items()
+            )
+            print(
+                "{:5d}".format(i),
+                "objective {:.6e}".format(self.objective[i]),
+                "violation {:.3e}".format(self.violation[i]),
+                desvars,
+                sep=" | ",
+            )
+
+
+def plot_monitor(monitor, interval):
+    """
+    Shows the history of a monitor in a matplotlib window, redrawn as iterations are recorded.
+    """
+    import matplotlib.pyplot as plt
+
+    plt.ion()
+    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(15, 4))
+    fig.suptitle("Live optimization history of " + monitor.filename)
+
+    while plt.fignum_exists(fig.number):
+        if monitor.update() > 0:
+            iterations = np.arange(len(monitor.iterations))
+            for ax in (ax1, ax2, ax3):
+                ax.clear()
+                ax.grid()
+
+            ax1.plot(iterations, monitor.objective)
+            ax1.set(xlabel="Iterations", ylabel="Objective")
+            ax2.semilogy(iterations, np.maximum(monitor.violation, 1e-16))
+            ax2.set(xlabel="Iterations", ylabel="Largest constraint violation")
+            for name, values in monitor.desvars.items():
+                ax3.plot(iterations, np.array(values), label=name)
+            ax3.set(xlabel="Iterations", ylabel="Design variables")
+            ax3.legend(fontsize="small")
+
+        plt.pause(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Follow the driver iterations of a running optimization")
+    parser.add_argument("recording", nargs="?", default="aerostruct.db")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between polls")
+    parser.add_argument("--plot", action="store_true", help="show live plots instead of the text dashboard")
+    args = parser.parse_args()
+
+    monitor = DriverMonitor(args.recording)
+
+    try:
+        if args.plot:
+            plot_monitor(monitor, args.interval)
+        else:
+            while True:
+                count = monitor.update()
+                if count > 0:
+                    monitor.print_new(count)
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
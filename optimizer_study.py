@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Optimizer Study of the CRJ700 Optimization
+
+ Runs the full CRJ700 optimization (CRJ700_final.py) from the same starting
+ point with several ScipyOptimizeDriver optimizers and tolerances, and
+ tabulates their cost to solution: model evaluations, gradient evaluations,
+ linear solves of the coupled groups, wall time, and the final fuel burn and
+ constraint violation.
+
+   python optimizer_study.py --optimizers SLSQP trust-constr --tols 1e-6 1e-9 --output optimizers.csv
+
+ Gradient-free optimizers (COBYLA) evaluate no gradients, so their cost is
+ all model evaluations. COBYLA only handles the equality constraints of the
+ CRJ700 problem from scipy 1.16, so it is not run by default. An optimizer
+ that fails is recorded with success False and its error, and the study
+ goes on with the next one.
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from CRJ700_problem import (FINAL_CONSTRAINTS, FINAL_DESIGN_VARS, clear_problem_cache, get_problem, max_violation,
+                            num_points, point_group)
+from solver_study import count_iterations
+
+# Columns of the results table
+COLUMNS = ["optimizer", "tol", "success", "driver_iterations", "model_evaluations", "gradient_evaluations",
+           "linear_solves", "linear_iterations", "wall_time", "fuelburn", "violation", "error"]
+
+
+def count_gradients(prob):
+    """
+    Makes the driver of a problem count its total derivative evaluations.
+
+    After this, prob.driver.gradient_evaluations counts the gradients and
+    prob.driver.gradient_linear_solves the linear solves of the coupled groups
+    they took. The coupled linear solvers must be counted with
+    solver_study.count_iterations.
+
+    Parameters
+    ----------
+    prob : om.Problem
+        A problem built by build_problem.
+    """
+    driver = prob.driver
+    compute_totals = driver._compute_totals
+    solvers = [point_group(prob, i).coupled.linear_solver for i in range(num_points(prob))
+               if point_group(prob, i) is not None]
+
+    def counted_compute_totals(*args, **kwargs):
+        solves = sum(solver.solves for solver in solvers)
+        totals = compute_totals(*args, **kwargs)
+        driver.gradient_evaluations += 1
+        driver.gradient_linear_solves += sum(solver.solves for solver in solvers) - solves
+        return totals
+
+    driver._compute_totals = counted_compute_totals
+    driver.gradient_evaluations = 0
+    driver.gradient_linear_solves = 0
+
+
+def run_optimizer(optimizer, tol, maxiter=200, num_x=5, num_y=21, initial_values=None):
+    """
+    Runs the CRJ700 optimization with one optimizer and tolerance.
+
+    The problem is built anew, so every optimizer starts from the same
+    design and coupled states.
+
+    Parameters
+    ----------
+    optimizer : str
+        Optimizer of the ScipyOptimizeDriver, e.g. "SLSQP".
+    tol : float
+        Tolerance of the optimizer.
+    maxiter : int
+        Maximum number of optimizer iterations.
+    num_x : int
+        Number of chordwise mesh points.
+    num_y : int
+        Number of spanwise mesh points.
+    initial_values : dict or None
+        Initial values, see get_problem.
+
+    Returns
+    -------
+    result : dict
+        The values of COLUMNS. If the optimization raised an exception, its
+        message is the error, success is False and the fuel burn and violation
+        are NaN; the counters are those reached before the failure.
+    """
+    clear_problem_cache()
+    prob = get_problem("CRJ700", num_x=num_x, num_y=num_y, span_cos_spacing=1, design_vars=FINAL_DESIGN_VARS,
+                       constraints=FINAL_CONSTRAINTS, initial_values=initial_values)
+    prob.driver.options["optimizer"] = optimizer
+    prob.driver.options["tol"] = tol
+    prob.driver.options["maxiter"] = maxiter
+
+    coupled = [point_group(prob, i).coupled for i in range(num_points(prob)) if point_group(prob, i) is not None]
+    for group in coupled:
+        count_iterations(group.linear_solver)
+    count_gradients(prob)
+
+    error = ""
+    start = time.time()
+    try:
+        prob.run_driver()
+    except Exception as exc:
+        # e.g. an optimizer that does not handle the constraint types, or a failed analysis
+        error = "{}: {}".format(type(exc).__name__, exc)
+    end = time.time()
+
+    try:
+        # scipy's result, when the optimizer got far enough to return one
+        scipy_result = getattr(prob.driver, "result", None)
+        success = not error and scipy_result is not None and bool(scipy_result.success)
+
+        result = {
+            "optimizer": optimizer,
+            "tol": tol,
+            "success": success,
+            "driver_iterations": prob.driver.iter_count,
+            "model_evaluations": prob.model.iter_count,
+            "gradient_evaluations": prob.driver.gradient_evaluations,
+            "linear_solves": prob.driver.gradient_linear_solves,
+            "linear_iterations": sum(group.linear_solver.total_iterations for group in coupled),
+            "wall_time": end - start,
+            "fuelburn": np.nan,
+            "violation": np.nan,
+            "error": error,
+        }
+        if not error:
+            result["fuelburn"] = float(prob.get_val("AS_point_0.fuelburn", get_remote=True)[0])
+            result["violation"] = float(max_violation(prob.driver.get_constraint_values(),
+                                                      prob.model.get_constraints()))
+    finally:
+        clear_problem_cache()
+
+    return result
+
+
+def write_results(results, filename):
+    """
+    Writes the results of run_optimizer as a .csv table.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare optimizers on the full CRJ700 optimization")
+    parser.add_argument("--optimizers", nargs="+", default=["SLSQP", "trust-constr"],
+                        help="optimizers of the ScipyOptimizeDriver (COBYLA needs scipy >= 1.16 for the equality "
+                             "constraints)")
+    parser.add_argument("--tols", type=float, nargs="+", default=[1e-9], help="tolerances run with every optimizer")
+    parser.add_argument("--maxiter", type=int, default=200)
+    parser.add_argument("--num_x", type=int, default=5)
+    parser.add_argument("--num_y", type=int, default=21)
+    parser.add_argument("--feasibility-tol", type=float, default=1e-6,
+                        help="largest constraint violation of a feasible optimum")
+    parser.add_argument("--output", default=None,
+                        help="CSV file the results are written to, rewritten after every optimization")
+    args = parser.parse_args()
+
+    print(*COLUMNS, sep=" | ")
+    results = []
+    for optimizer in args.optimizers:
+        for tol in args.tols:
+            result = run_optimizer(optimizer, tol, args.maxiter, args.num_x, args.num_y)
+            results.append(result)
+            print(*[result[name] for name in COLUMNS], sep=" | ")
+
+            # Written after every run, so an interrupted study keeps the finished ones
+            if args.output is not None:
+                write_results(results, args.output)
+
+    # Cost to solution of the optimizers that reached a feasible optimum
+    feasible = [result for result in results if result["violation"] <= args.feasibility_tol]
+    if feasible:
+        best_fuelburn = min(result["fuelburn"] for result in feasible)
+        print("Feasible optima, cheapest first (fuel burn relative to the best one):")
+        for result in sorted(feasible, key=lambda result: result["wall_time"]):
+            print("   ", result["optimizer"], result["tol"], result["wall_time"], "[s]",
+                  result["fuelburn"] / best_fuelburn - 1.0)
+    else:
+        print("No optimizer reached a feasible optimum")
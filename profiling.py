@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Component Profiling
+
+ Opt-in instrumentation that counts the calls and the cumulative time of the
+ compute/compute_partials (explicit) and apply_nonlinear/solve_nonlinear/
+ linearize (implicit) methods of every component of a set up problem, to
+ find out which OpenAeroStruct components dominate a run: the VLM AIC
+ assembly, the wingbox FEM solve, the ExecComps, etc.
+
+ The model methods (compute, apply_nonlinear, ...) and the derivative methods
+ (compute_partials, linearize, ...) are reported apart. The data can be
+ written as folded stacks ("model;AS_point_0;coupled;wing compute 1234"),
+ which flamegraph.pl, speedscope or inferno read directly.
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import functools
+import time
+from collections import defaultdict
+
+import openmdao.api as om
+
+# Profiled component methods and whether they belong to the model run or to
+# the derivative evaluation
+PROFILED_METHODS = {
+    om.ExplicitComponent: {
+        "compute": "model",
+        "compute_partials": "derivatives",
+        "compute_jacvec_product": "derivatives",
+    },
+    om.ImplicitComponent: {
+        "guess_nonlinear": "model",
+        "apply_nonlinear": "model",
+        "solve_nonlinear": "model",
+        "linearize": "derivatives",
+        "apply_linear": "derivatives",
+        "solve_linear": "derivatives",
+    },
+}
+
+
+class ComponentProfile:
+    """
+    Call counts and cumulative times of the component methods of a problem.
+
+    Attributes
+    ----------
+    calls : dict
+        Number of calls, keyed by (component pathname, method).
+    times : dict
+        Cumulative wall time [s], keyed by (component pathname, method).
+    classes : dict
+        Class name of each profiled component, keyed by pathname.
+    """
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.times = defaultdict(float)
+        self.classes = {}
+
+    def instrument(self, prob):
+        """
+        Wraps the methods of every local component of a set up problem.
+
+        Only the methods a component overrides are wrapped, so the no-op
+        defaults of OpenMDAO do not clutter the report. Instrumenting the
+        same problem twice has no further effect.
+
+        Parameters
+        ----------
+        prob : om.Problem
+            The problem, after setup.
+        """
+        for base, methods in PROFILED_METHODS.items():
+            for comp in prob.model.system_iter(recurse=True, typ=base):
+                if comp.pathname in self.classes:
+                    continue
+                self.classes[comp.pathname] = type(comp).__name__
+
+                for method in methods:
+                    if getattr(type(comp), method) is not getattr(base, method):
+                        setattr(comp, method, self._wrap(comp.pathname, method, getattr(comp, method)))
+
+    def _wrap(self, pathname, method, func):
+        key = (pathname, method)
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.times[key] += time.perf_counter() - start
+                self.calls[key] += 1
+
+        return timed
+
+    def reset(self):
+        """
+        Clears the counts and times, keeping the instrumentation.
+        """
+        self.calls.clear()
+        self.times.clear()
+
+    def phase_totals(self):
+        """
+        Returns the total time spent in the model and derivative methods.
+
+        Returns
+        -------
+        totals : dict
+            Cumulative time [s] of the "model" and "derivatives" methods.
+        """
+        phases = {}
+        for methods in PROFILED_METHODS.values():
+            phases.update(methods)
+
+        totals = {"model": 0.0, "derivatives": 0.0}
+        for (pathname, method), seconds in self.times.items():
+            totals[phases[method]] += seconds
+        return totals
+
+    def report(self, limit=30):
+        """
+        Prints the profiled methods, the most expensive first.
+
+        Parameters
+        ----------
+        limit : int or None
+            Number of rows printed. If None, every method is printed.
+        """
+        totals = self.phase_totals()
+        total = sum(totals.values())
+        print("Component time: model", totals["model"], "[s], derivatives", totals["derivatives"], "[s]")
+
+        rows = sorted(self.times, key=self.times.get, reverse=True)
+        print("time [s]", "% of component time", "calls", "time per call [s]", "method", "component", sep=" | ")
+        for pathname, method in rows[:limit]:
+            seconds = self.times[pathname, method]
+            calls = self.calls[pathname, method]
+            print(
+                "{:.4f}".format(seconds),
+                "{:.1f}".format(100 * seconds / total if total > 0 else 0.0),
+                calls,
+                "{:.2e}".format(seconds / calls),
+                method,
+                "{} ({})".format(pathname, self.classes[pathname]),
+                sep=" | ",
+            )
+
+    def write_folded(self, filename):
+        """
+        Writes the times as folded stacks for flamegraph tools.
+
+        Each line is the component path from the model, then the method, and
+        the cumulative time in microseconds.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the folded stacks file.
+        """
+        with open(filename, "w") as f:
+            for (pathname, method), seconds in sorted(self.times.items()):
+                stack = ";".join(["model"] + pathname.split(".") + [method])
+                f.write("{} {}\n".format(stack, int(round(seconds * 1e6))))
+
+
+def profile_components(prob):
+    """
+    Instruments the components of a set up problem and returns their profile.
+
+    Parameters
+    ----------
+    prob : om.Problem
+        The problem, after setup.
+
+    Returns
+    -------
+    profile : ComponentProfile
+        The profile, filled as the problem runs.
+    """
+    profile = ComponentProfile()
+    profile.instrument(prob)
+    return profile
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Coarse-to-Fine Transfer of Designs and Coupled States
+
+ Interpolates the design variables and the converged structural states
+ (nodal displacements and loads) of a problem onto the same model on a
+ finer mesh, so its optimization or MDA starts close to the solution.
+
+ The states are interpolated along the normalized spanwise coordinate of
+ the FEM nodes, taken from the undeformed surface mesh, so the transfer does
+ not depend on the span of the design. The circulations are not transferred:
+ the aerodynamic system is solved directly at every coupled iteration, so
+ they are not an initial guess of anything.
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import numpy as np
+from openaerostruct.integration.aerostruct_groups import AerostructGeometry
+
+from CRJ700_problem import num_points, point_group
+
+
+def problem_surfaces(prob):
+    """
+    Returns the surface dictionaries of a problem built by build_problem, keyed by name.
+    """
+    return {
+        geometry.options["surface"]["name"]: geometry.options["surface"]
+        for geometry in prob.model.system_iter(recurse=False, typ=AerostructGeometry)
+    }
+
+
+def spanwise_coordinate(surface):
+    """
+    Returns the normalized spanwise coordinate of the nodes of a surface.
+
+    Parameters
+    ----------
+    surface : dict
+        Surface dictionary, with its undeformed mesh.
+
+    Returns
+    -------
+    eta : numpy array
+        Spanwise coordinate of each node, from -1 at the tip to 0 at the root
+        for a symmetric surface.
+    """
+    y = surface["mesh"][0, :, 1]
+    return y / np.max(np.abs(y))
+
+
+def spanwise_interp(values, eta_coarse, eta_fine, conserve=False):
+    """
+    Interpolates nodal values along the span.
+
+    Parameters
+    ----------
+    values : numpy array
+        Values at the coarse nodes, shape (num_coarse_nodes, ...).
+    eta_coarse : numpy array
+        Spanwise coordinate of the coarse nodes.
+    eta_fine : numpy array
+        Spanwise coordinate of the fine nodes.
+    conserve : bool
+        If True, the interpolated values are rescaled so that their sum over
+        the nodes equals the coarse one, as for nodal loads.
+
+    Returns
+    -------
+    fine_values : numpy array
+        Values at the fine nodes, shape (num_fine_nodes, ...).
+    """
+    order = np.argsort(eta_coarse)
+    flat = values.reshape(len(eta_coarse), -1)[order]
+    fine = np.column_stack([np.interp(eta_fine, eta_coarse[order], column) for column in flat.T])
+
+    if conserve:
+        coarse_total = flat.sum(axis=0)
+        fine_total = fine.sum(axis=0)
+        scale = np.divide(coarse_total, fine_total, out=np.ones_like(coarse_total), where=fine_total != 0)
+        fine *= scale
+
+    return fine.reshape((len(eta_fine),) + values.shape[1:])
+
+
+def cp_interp(values, num_cp):
+    """
+    Interpolates control point values onto a different number of control points.
+
+    Parameters
+    ----------
+    values : numpy array
+        Control point values, along the last axis.
+    num_cp : int
+        Number of control points of the result.
+
+    Returns
+    -------
+    fine_values : numpy array
+        Values at num_cp control points spread over the same range.
+    """
+    values = np.atleast_1d(values)
+    if values.shape[-1] == num_cp:
+        return values.copy()
+
+    eta_coarse = np.linspace(0.0, 1.0, values.shape[-1])
+    eta_fine = np.linspace(0.0, 1.0, num_cp)
+    return np.apply_along_axis(lambda column: np.interp(eta_fine, eta_coarse, column), -1, values)
+
+
+def transfer_design_vars(coarse, fine, names):
+    """
+    Sets the design variables of a problem to those of another one, interpolating control points.
+
+    Parameters
+    ----------
+    coarse : om.Problem
+        The problem the values are read from.
+    fine : om.Problem
+        The problem the values are set to.
+    names : tuple of str
+        Promoted names of the design variables.
+    """
+    # Before final_setup, get_val returns the default shapes of some inputs (e.g. () instead of (1,))
+    fine.final_setup()
+
+    for name in names:
+        value = np.asarray(coarse.get_val(name, get_remote=True))
+        shape = np.shape(fine.get_val(name, get_remote=True))
+        if value.size != np.prod(shape, dtype=int):
+            value = cp_interp(value, shape[-1])
+        fine.set_val(name, value.reshape(shape))
+
+
+def prolong_states(coarse, fine):
+    """
+    Initialises the displacements and loads of every coupled group from a coarser problem.
+
+    Parameters
+    ----------
+    coarse : om.Problem
+        A problem built by build_problem that has been run.
+    fine : om.Problem
+        The same model on a finer mesh, not yet run.
+    """
+    coarse_surfaces = problem_surfaces(coarse)
+    for name, surface in problem_surfaces(fine).items():
+        eta_coarse = spanwise_coordinate(coarse_surfaces[name])
+        eta_fine = spanwise_coordinate(surface)
+
+        for i in range(num_points(fine)):
+            point_name = "AS_point_{}.coupled.".format(i)
+            disp = coarse.get_val(point_name + name + ".disp", get_remote=True)
+            loads = coarse.get_val(point_name + name + "_loads.loads", get_remote=True)
+
+            # Under MPI each rank only sets the states of its own points
+            if point_group(fine, i) is None:
+                continue
+            fine.set_val(point_name + name + ".disp", spanwise_interp(disp, eta_coarse, eta_fine))
+            fine.set_val(point_name + name + "_loads.loads", spanwise_interp(loads, eta_coarse, eta_fine, conserve=True))
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Persistent MDA Result Cache
+
+ On-disk cache of MDA results, addressed by a SHA-256 hash of everything
+ that determines them: the full surface dicts (meshes included), the flight
+ conditions, the input values, the source of the model builder and the
+ OpenMDAO/OpenAeroStruct/NumPy versions. Changing any of them gives a new
+ key, so stale results are never returned, and rerunning a study only
+ computes the cases missing from the cache.
+
+ Each result is a small JSON file named after its key. The least recently
+ used files are evicted when the cache grows over its size limit. Files are
+ written atomically, so concurrent workers can share a cache directory.
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import openaerostruct
+import openmdao
+
+# Modules whose source defines the model, so editing them invalidates the cache
+MODEL_FILES = ["CRJ700_problem.py", "mission_comps.py", "sweep_times_span.py"]
+
+
+def _update_hash(h, obj):
+    """
+    Feeds a canonical representation of nested dicts, sequences, arrays and scalars to a hash.
+    """
+    if isinstance(obj, dict):
+        h.update(b"{")
+        for key in sorted(obj, key=str):
+            _update_hash(h, str(key))
+            _update_hash(h, obj[key])
+        h.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for item in obj:
+            _update_hash(h, item)
+        h.update(b"]")
+    elif isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        h.update("array {} {}:".format(array.dtype.str, array.shape).encode())
+        h.update(array.tobytes())
+    else:
+        h.update("{}:{!r};".format(type(obj).__name__, obj).encode())
+
+
+def content_key(**inputs):
+    """
+    Returns the cache key of an MDA.
+
+    Parameters
+    ----------
+    **inputs
+        Everything the result depends on (surfaces, mesh sizes, flight
+        points, input values, ...), as nested dicts, sequences, arrays and
+        scalars. The library versions and model sources are added here.
+
+    Returns
+    -------
+    key : str
+        Hexadecimal SHA-256 digest.
+    """
+    h = hashlib.sha256()
+    _update_hash(h, inputs)
+    _update_hash(h, {
+        "numpy": np.__version__,
+        "openmdao": openmdao.__version__,
+        "openaerostruct": openaerostruct.__version__,
+    })
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for filename in MODEL_FILES:
+        with open(os.path.join(directory, filename), "rb") as f:
+            h.update(f.read())
+
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Directory of MDA results keyed by content_key, with size-based LRU eviction.
+
+    Attributes
+    ----------
+    directory : str
+        Directory of the result files.
+    max_bytes : int
+        Size above which the least recently used results are evicted.
+    """
+
+    def __init__(self, directory=".mda_cache", max_bytes=64 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """
+        Returns the results stored under a key, or None if there are none.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                results = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # The modification time orders the eviction, so a hit renews the entry
+        os.utime(path)
+        return results
+
+    def put(self, key, results):
+        """
+        Stores results under a key and evicts the least recently used ones if needed.
+
+        Parameters
+        ----------
+        key : str
+            Key given by content_key.
+        results : dict
+            JSON-serializable results (floats, lists, ...).
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(results, f)
+        os.replace(tmp, self._path(key))
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used results until the cache fits in max_bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry[1] for entry in entries)
+        for mtime, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already evicted by another worker
+                pass
+            size -= entry_size
+
+    def clear(self):
+        """
+        Removes every stored result.
+        """
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                os.remove(entry.path)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Coupled Solver Strategy Study
+
+ Runs the CRJ700 analysis and its total derivatives with every coupled
+ solver strategy of CRJ700_problem.COUPLED_SOLVERS, for several meshes, and
+ reports the iteration counts of each flight point and the wall times.
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import argparse
+import time
+
+import openmdao.api as om
+
+from CRJ700_problem import COUPLED_SOLVERS, get_problem, num_points, point_group
+
+
+def count_iterations(solver):
+    """
+    Makes a solver accumulate the iterations of all its solves.
+
+    After this, solver.solves counts the calls to solve and
+    solver.total_iterations the iterations they took. Calling it again on the
+    same solver only resets the counters.
+
+    Parameters
+    ----------
+    solver : om.NonlinearSolver or om.LinearSolver
+        The solver to count.
+    """
+    if not hasattr(solver, "total_iterations"):
+        solve = solver.solve
+
+        def counted_solve(*args, **kwargs):
+            result = solve(*args, **kwargs)
+            solver.solves += 1
+            solver.total_iterations += solver._iter_count
+            return result
+
+        solver.solve = counted_solve
+
+    solver.solves = 0
+    solver.total_iterations = 0
+
+
+def run_strategy(num_x, num_y, strategy):
+    """
+    Runs the model and its total derivatives with one coupled solver strategy.
+
+    Parameters
+    ----------
+    num_x : int
+        Number of chordwise mesh points.
+    num_y : int
+        Number of spanwise mesh points.
+    strategy : str
+        Key of COUPLED_SOLVERS.
+
+    Returns
+    -------
+    result : dict
+        Wall times of run_model and compute_totals [s], and the nonlinear and
+        linear iterations of each point, as lists. "converged" is False if a
+        coupled solver raised an AnalysisError, in which case the derivatives
+        are not computed and their time and iterations are None.
+    """
+    prob = get_problem("CRJ700", num_x=num_x, num_y=num_y, coupled_solver=strategy)
+    prob.final_setup()
+
+    coupled = [point_group(prob, i).coupled for i in range(num_points(prob))]
+    for group in coupled:
+        count_iterations(group.nonlinear_solver)
+        count_iterations(group.linear_solver)
+
+    start = time.perf_counter()
+    try:
+        prob.run_model()
+    except om.AnalysisError:
+        return {
+            "converged": False,
+            "run_model": time.perf_counter() - start,
+            "compute_totals": None,
+            "nonlinear_iterations": [group.nonlinear_solver.total_iterations for group in coupled],
+            "linear_iterations": None,
+        }
+    run_time = time.perf_counter() - start
+    nonlinear_iterations = [group.nonlinear_solver.total_iterations for group in coupled]
+
+    for group in coupled:
+        count_iterations(group.linear_solver)
+
+    start = time.perf_counter()
+    prob.compute_totals()
+    totals_time = time.perf_counter() - start
+    linear_iterations = [group.linear_solver.total_iterations for group in coupled]
+
+    return {
+        "converged": True,
+        "run_model": run_time,
+        "compute_totals": totals_time,
+        "nonlinear_iterations": nonlinear_iterations,
+        "linear_iterations": linear_iterations,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the coupled solver strategies of the CRJ700 model")
+    parser.add_argument("--num_x", type=int, default=5)
+    parser.add_argument("--num_y", type=int, nargs="+", default=[11, 21, 41])
+    parser.add_argument("--strategies", nargs="+", choices=sorted(COUPLED_SOLVERS), default=sorted(COUPLED_SOLVERS))
+    args = parser.parse_args()
+
+    print("num_y", "strategy", "run_model [s]", "compute_totals [s]",
+          "NL iterations (cruise, 2.5g)", "linear iterations (cruise, 2.5g)", sep=" | ")
+    for num_y in args.num_y:
+        times = {}
+        for strategy in args.strategies:
+            result = run_strategy(args.num_x, num_y, strategy)
+            if not result["converged"]:
+                print(num_y, strategy, "NOT CONVERGED after", result["run_model"], "[s]",
+                      result["nonlinear_iterations"], sep=" | ")
+                continue
+            times[strategy] = result["run_model"] + result["compute_totals"]
+            print(num_y, strategy, result["run_model"], result["compute_totals"],
+                  result["nonlinear_iterations"], result["linear_iterations"], sep=" | ")
+
+        # Only the strategies that converged are compared
+        if times:
+            print("Fastest strategy for num_y =", num_y, "is", min(times, key=times.get))
+        else:
+            print("No strategy converged for num_y =", num_y)
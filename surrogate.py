@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Final Project - Surrogate Model of the CRJ700 Fuel Burn and Failure
+
+ Trains a kriging (or RBF) surrogate of the cruise fuel burn and maneuver
+ failure of the CRJ700 MDA over the wing span, sweep, taper and thickness
+ to chord ratio, from batches of analyses run by doe_sweep. The surrogate
+ stands in for the coupled AerostructPoints in an exploratory optimization
+ whose gradients come from the surrogate, so it runs in seconds.
+
+ Every optimum found is checked with a truth MDA, which is added to the
+ training data, and the surrogate is retrained in place (same problem, no
+ new setup) before the next exploration:
+
+   python surrogate.py --samples 64 --workers 0 --iterations 5
+
+ The surrogate is trained on untrimmed MDAs at the baseline angles of
+ attack, so its optimum is a starting point for CRJ700_final.py, not a
+ replacement for it.
+
+ ========================================================================
+   Instituto Superior Técnico - Aircraft Optimal Design - 2023
+
+   96375 Filipe Valquaresma
+   filipevalquaresma@tecnico.ulisboa.pt
+
+   95782 Diogo Faustino
+   diogovicentefaustino@tecnico.ulisboa.pt
+ ========================================================================
+"""
+
+import argparse
+import os
+
+import numpy as np
+import openmdao.api as om
+
+from CRJ700_problem import CONSTRAINTS
+from doe_sweep import BASELINE, FACTORS, design, run_design
+from sweep_times_span import SweepTimesSpan
+
+# Inputs and outputs of the surrogate, as doe_sweep factors and responses
+SURROGATE_INPUTS = ("span", "sweep", "taper", "t_over_c")
+SURROGATE_OUTPUTS = ("fuelburn", "failure")
+
+# Units of the dimensional surrogate inputs, as declared by the design variables
+SURROGATE_UNITS = {"span": "m", "sweep": "deg"}
+
+
+class TrainingData:
+    """
+    Truth evaluations of the surrogate outputs, grown as new analyses are run.
+
+    Attributes
+    ----------
+    x : numpy array
+        Surrogate inputs of every evaluation, shape (num_points, len(SURROGATE_INPUTS)).
+    y : dict
+        Value of each surrogate output at every evaluation.
+    """
+
+    def __init__(self):
+        self.x = np.empty((0, len(SURROGATE_INPUTS)))
+        self.y = {name: np.empty(0) for name in SURROGATE_OUTPUTS}
+
+    def add(self, points, table):
+        """
+        Adds a batch of evaluations, skipping the failed analyses.
+
+        Parameters
+        ----------
+        points : numpy array
+            Surrogate inputs of the batch, shape (num_points, len(SURROGATE_INPUTS)).
+        table : numpy array
+            Results of the batch, as returned by doe_sweep.run_design.
+        """
+        valid = np.all([np.isfinite(table[name]) for name in SURROGATE_OUTPUTS], axis=0)
+        self.x = np.vstack([self.x, points[valid]])
+        for name in SURROGATE_OUTPUTS:
+            self.y[name] = np.concatenate([self.y[name], table[name][valid]])
+
+    def evaluate(self, points, workers=1, num_x=5, num_y=21, cache=None):
+        """
+        Runs the truth MDAs of some points and adds them.
+
+        Parameters
+        ----------
+        points : numpy array
+            Surrogate inputs, shape (num_points, len(SURROGATE_INPUTS)).
+        workers : int or None
+            Number of worker processes, see doe_sweep.run_design.
+        num_x : int
+            Number of chordwise mesh points.
+        num_y : int
+            Number of spanwise mesh points.
+        cache : str or None
+            Directory of a persistent result cache.
+
+        Returns
+        -------
+        table : numpy array
+            Results of the MDAs, see doe_sweep.run_design.
+        """
+        table = run_design(points, SURROGATE_INPUTS, workers=workers, num_x=num_x, num_y=num_y, cache=cache)
+        self.add(points, table)
+        return table
+
+    def save(self, filename):
+        """
+        Saves the evaluations to a .npz file.
+        """
+        np.savez(filename, x=self.x, **self.y)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Loads the evaluations saved by save.
+        """
+        data = cls()
+        with np.load(filename) as f:
+            data.x = f["x"]
+            for name in SURROGATE_OUTPUTS:
+                data.y[name] = f[name]
+        return data
+
+
+def make_surrogate(kind="kriging"):
+    """
+    Returns a new surrogate with analytic gradients.
+
+    Parameters
+    ----------
+    kind : str
+        "kriging" or "rbf" (radial basis functions on the nearest neighbours).
+    """
+    if kind == "kriging":
+        return om.KrigingSurrogate(eval_rmse=False)
+    if kind == "rbf":
+        return om.NearestNeighbor(interpolant_type="rbf")
+    raise ValueError("Unknown surrogate '{}', expected 'kriging' or 'rbf'".format(kind))
+
+
+def build_surrogate_problem(data, kind="kriging"):
+    """
+    Builds the exploratory optimization of the CRJ700 wing planform on the surrogate.
+
+    Fuel burn is minimized over span, sweep, taper and t/c, subject to the
+    maneuver failure and to the sweep times span constraint, with SLSQP.
+
+    Parameters
+    ----------
+    data : TrainingData
+        Evaluations the surrogate is trained on.
+    kind : str
+        Surrogate type, see make_surrogate.
+
+    Returns
+    -------
+    prob : om.Problem
+        The set up problem.
+    """
+    prob = om.Problem()
+
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output("span", val=BASELINE["span"], units=SURROGATE_UNITS["span"])
+    indep_var_comp.add_output("sweep", val=BASELINE["sweep"], units=SURROGATE_UNITS["sweep"])
+    indep_var_comp.add_output("taper", val=BASELINE["taper"])
+    indep_var_comp.add_output("t_over_c", val=BASELINE["t_over_c"])
+    prob.model.add_subsystem("prob_vars", indep_var_comp, promotes=["*"])
+
+    meta = om.MetaModelUnStructuredComp(default_surrogate=make_surrogate(kind))
+    for name in SURROGATE_INPUTS:
+        meta.add_input(name, val=BASELINE[name], units=SURROGATE_UNITS.get(name))
+    for name in SURROGATE_OUTPUTS:
+        meta.add_output(name, val=0.0)
+    prob.model.add_subsystem("meta", meta, promotes=["*"])
+
+    prob.model.add_subsystem("sweep_constraint", SweepTimesSpan(), promotes_inputs=["sweep", "span"],
+                             promotes_outputs=["sweep_times_span"])
+
+    prob.model.add_objective("fuelburn", scaler=1e-5)
+    for name in SURROGATE_INPUTS:
+        lower, upper = FACTORS[name]
+        prob.model.add_design_var(name, lower=lower, upper=upper, ref=upper)
+    prob.model.add_constraint("failure", upper=0.0)
+    prob.model.add_constraint("sweep_times_span", **CONSTRAINTS["CRJ700"]["sweep_times_span"])
+
+    prob.driver = om.ScipyOptimizeDriver()
+    prob.driver.options["optimizer"] = "SLSQP"
+    prob.driver.options["tol"] = 1e-9
+
+    prob.setup()
+
+    train(prob, data)
+
+    return prob
+
+
+def train(prob, data):
+    """
+    Sets the training data of the surrogate of a problem, which is retrained on its next run.
+
+    Parameters
+    ----------
+    prob : om.Problem
+        A problem built by build_surrogate_problem.
+    data : TrainingData
+        Evaluations the surrogate is trained on.
+    """
+    meta = prob.model.meta
+    for i, name in enumerate(SURROGATE_INPUTS):
+        meta.options["train_" + name] = data.x[:, i]
+    for name in SURROGATE_OUTPUTS:
+        meta.options["train_" + name] = data.y[name]
+    meta.train = True
+
+
+def explore(prob, data, iterations=5, num_x=5, num_y=21, cache=None):
+    """
+    Alternates surrogate optimizations and truth evaluations of their optima.
+
+    Parameters
+    ----------
+    prob : om.Problem
+        A problem built by build_surrogate_problem.
+    data : TrainingData
+        Evaluations the surrogate is trained on, grown with every optimum.
+    iterations : int
+        Number of optimizations.
+    num_x, num_y, cache
+        Options of the truth evaluations, see TrainingData.evaluate.
+
+    Returns
+    -------
+    optimum : numpy array or None
+        Surrogate inputs of the last optimum, None if iterations is 0.
+    """
+    optimum = None
+    for i in range(iterations):
+        prob.run_driver()
+        optimum = np.array([[prob.get_val(name)[0] for name in SURROGATE_INPUTS]])
+
+        predicted = {name: prob.get_val(name)[0] for name in SURROGATE_OUTPUTS}
+        table = data.evaluate(optimum, workers=1, num_x=num_x, num_y=num_y, cache=cache)
+        print("Iteration", i, "optimum", dict(zip(SURROGATE_INPUTS, optimum[0])))
+        for name in SURROGATE_OUTPUTS:
+            print("   ", name, "surrogate", predicted[name], "truth", table[name][0])
+
+        train(prob, data)
+
+    return None if optimum is None else optimum[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explore the CRJ700 planform on a surrogate model")
+    parser.add_argument("--training", default="surrogate_training.npz",
+                        help="truth evaluations, loaded if the file exists and saved with the new ones")
+    parser.add_argument("--samples", type=int, default=64, help="LHS points evaluated before the exploration")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--surrogate", choices=["kriging", "rbf"], default="kriging")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (1 runs serially, 0 uses one per CPU)")
+    parser.add_argument("--num_x", type=int, default=5)
+    parser.add_argument("--num_y", type=int, default=21)
+    parser.add_argument("--cache", default=None, help="directory of a persistent result cache")
+    args = parser.parse_args()
+
+    data = TrainingData.load(args.training) if os.path.exists(args.training) else TrainingData()
+    if args.samples > 0:
+        points = design("lhs", args.samples, args.seed, SURROGATE_INPUTS)
+        data.evaluate(points, workers=args.workers or None, num_x=args.num_x, num_y=args.num_y, cache=args.cache)
+        data.save(args.training)
+
+    prob = build_surrogate_problem(data, args.surrogate)
+    explore(prob, data, args.iterations, num_x=args.num_x, num_y=args.num_y, cache=args.cache)
+    data.save(args.training)
@@ -13,45 +13,52 @@ Assignment 3 - Problem 3 c) - Function Sweep times Span
  ========================================================================
 """
 
+import numpy as np
 import openmdao.api as om
 
 class SweepTimesSpan(om.ExplicitComponent):
     """
     Calculate sweep times span as an aerodynamic function.
 
+    Options
+    -------
+    num_nodes : int
+        Number of surfaces or design candidates evaluated at once.
+
     Parameters
     ----------
-    sweep : float
-        Wing sweep angle in degrees.
-    span : float
-        Wing span in meters.
+    sweep : numpy array
+        Wing sweep angles in degrees.
+    span : numpy array
+        Wing spans in meters.
 
     Returns
     -------
-    sweep_times_span : float
-        Sweep times span value.
+    sweep_times_span : numpy array
+        Sweep times span values.
 
     """
 
+    def initialize(self):
+        self.options.declare("num_nodes", default=1, types=int)
+
     def setup(self):
-        self.add_input("sweep", val=1.0, units="deg")
-        self.add_input("span", val=0.0, units="m")
+        nn = self.options["num_nodes"]
+
+        self.add_input("sweep", val=np.ones(nn), units="deg")
+        self.add_input("span", val=np.zeros(nn), units="m")
         #self.add_input("mesh")
-        self.add_output("sweep_times_span", val=0.0, units="deg*m")
+        self.add_output("sweep_times_span", val=np.zeros(nn), units="deg*m")
 
-        self.declare_partials("sweep_times_span", "sweep")
-        self.declare_partials("sweep_times_span", "span")
+        # Each value only depends on its own sweep and span
+        arange = np.arange(nn)
+        self.declare_partials("sweep_times_span", "sweep", rows=arange, cols=arange)
+        self.declare_partials("sweep_times_span", "span", rows=arange, cols=arange)
     
 
     def compute(self, inputs, outputs):
-        sweep = inputs["sweep"]
-        span = inputs["span"]
-
-        outputs["sweep_times_span"] = span * sweep  
+        outputs["sweep_times_span"] = inputs["span"] * inputs["sweep"]
 
     def compute_partials(self, inputs, partials):
-        sweep = inputs["sweep"]
-        span = inputs["span"]
-
-        partials["sweep_times_span", "sweep"] = span
-        partials["sweep_times_span", "span"] = sweep
+        partials["sweep_times_span", "sweep"] = inputs["span"]
+        partials["sweep_times_span", "span"] = inputs["sweep"]